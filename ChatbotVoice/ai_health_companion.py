@@ -1,10 +1,15 @@
 import os
+import re
+import json
 import time
+import queue
 import pyttsx3
 import datetime
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import threading
 import keyboard
+import numpy as np
 import speech_recognition as sr
 from dotenv import load_dotenv
 from translate import translate_text, detect_language
@@ -21,7 +26,20 @@ engine = pyttsx3.init()
 speech_lock = threading.Lock()
 
 AUDIO_FOLDER = "audio_inputs"
-os.makedirs(AUDIO_FOLDER, exist_ok=True)
+# Keep a FLAC copy of every utterance in AUDIO_FOLDER (off by default)
+ARCHIVE_AUDIO = os.getenv("ARCHIVE_AUDIO", "false").lower() in ("1", "true", "yes")
+SILENCE_PAD_SECONDS = 0.2  # Kept around trimmed speech so word onsets are not clipped
+
+# Long voice notes are cut at pauses into ~LONG_AUDIO_SEGMENT_SECONDS pieces transcribed in parallel
+LONG_AUDIO_SEGMENT_SECONDS = float(os.getenv("LONG_AUDIO_SEGMENT_SECONDS", "30"))
+LONG_AUDIO_MAX_SECONDS = int(os.getenv("LONG_AUDIO_MAX_SECONDS", "600"))
+LONG_AUDIO_WORKERS = int(os.getenv("LONG_AUDIO_WORKERS", "8"))
+
+GROQ_ENDPOINT = "https://api.groq.com/openai/v1/chat/completions"
+MODEL_NAME = "llama3-70b-8192"
+
+# Stream the reply and speak it sentence by sentence instead of all at the end
+PIPELINED_VOICE = os.getenv("PIPELINED_VOICE", "true").lower() in ("1", "true", "yes")
 
 def speak(text):
     def _speak():
@@ -37,9 +55,20 @@ def stop_speech():
         engine.stop()
 
 def transcribe_audio_file(filepath):
-    headers = {'authorization': ASSEMBLYAI_API_KEY}
     with open(filepath, 'rb') as f:
-        response = requests.post("https://api.assemblyai.com/v2/upload", headers=headers, data=f.read())
+        return transcribe_audio_bytes(f.read())
+
+def _upload_chunks(data, chunk_size=64 * 1024):
+    # Chunked transfer: the upload starts before requests has to size the body
+    for start in range(0, len(data), chunk_size):
+        yield data[start:start + chunk_size]
+
+def transcribe_audio_bytes(data):
+    """
+    Uploads encoded audio (WAV, FLAC, ...) straight from memory and waits for the transcript.
+    """
+    headers = {'authorization': ASSEMBLYAI_API_KEY}
+    response = requests.post("https://api.assemblyai.com/v2/upload", headers=headers, data=_upload_chunks(data))
     response.raise_for_status()
     audio_url = response.json()['upload_url']
 
@@ -62,30 +91,106 @@ def transcribe_audio_file(filepath):
 
     raise Exception("❌ Transcription timed out.")
 
-def record_and_transcribe():
+def _frame_rms(audio, frame_ms):
+    # int16 samples, samples per frame, and the RMS of each whole frame
+    samples = np.frombuffer(audio.get_raw_data(convert_width=2), dtype=np.int16)
+    frame = max(1, audio.sample_rate * frame_ms // 1000)
+    n_frames = len(samples) // frame
+    frames = samples[:n_frames * frame].reshape(n_frames, frame).astype(np.float32)
+    return samples, frame, np.sqrt(np.mean(frames ** 2, axis=1))
+
+def trim_silence(audio, threshold, frame_ms=30):
+    """
+    Drops leading and trailing frames whose RMS is below `threshold` (the
+    recognizer's calibrated energy threshold, same int16 RMS scale).
+    """
+    samples, frame, rms = _frame_rms(audio, frame_ms)
+    voiced = np.flatnonzero(rms >= threshold)
+    if len(voiced) == 0:
+        return audio
+    pad = int(SILENCE_PAD_SECONDS * audio.sample_rate)
+    start = max(0, voiced[0] * frame - pad)
+    end = min(len(samples), (voiced[-1] + 1) * frame + pad)
+    return sr.AudioData(samples[start:end].tobytes(), audio.sample_rate, 2)
+
+def split_at_silence(audio, segment_seconds=LONG_AUDIO_SEGMENT_SECONDS, frame_ms=30):
+    """
+    Cuts audio into segments of roughly `segment_seconds`, each cut placed at
+    the quietest frame in the second half of the segment, so a word is never
+    split across two transcription jobs.
+    """
+    samples, frame, rms = _frame_rms(audio, frame_ms)
+    target = max(2, int(segment_seconds * 1000 / frame_ms))
+    cuts = [0]
+    while len(rms) - cuts[-1] > target * 3 // 2:
+        window = rms[cuts[-1] + target // 2:cuts[-1] + target]
+        cuts.append(cuts[-1] + target // 2 + int(np.argmin(window)))
+    bounds = [cut * frame for cut in cuts] + [len(samples)]
+    return [sr.AudioData(samples[start:end].tobytes(), audio.sample_rate, 2)
+            for start, end in zip(bounds, bounds[1:])]
+
+def transcribe_long_audio(audio, on_partial=None):
+    """
+    Transcribes the segments of a long recording concurrently and stitches
+    the texts back in order. `on_partial(index, total, text)` is called as
+    each segment finishes, in completion order.
+    """
+    segments = split_at_silence(audio)
+    texts = [""] * len(segments)
+    with ThreadPoolExecutor(max_workers=min(LONG_AUDIO_WORKERS, len(segments))) as pool:
+        futures = {pool.submit(transcribe_audio_bytes, segment.get_flac_data()): i
+                   for i, segment in enumerate(segments)}
+        for future in as_completed(futures):
+            i = futures[future]
+            texts[i] = (future.result() or "").strip()
+            if on_partial:
+                on_partial(i, len(segments), texts[i])
+    return " ".join(text for text in texts if text)
+
+def transcribe_long_audio_file(filepath, on_partial=None):
+    # Voice notes received as files (WAV/AIFF/FLAC)
+    with sr.AudioFile(filepath) as source:
+        audio = sr.Recognizer().record(source)
+    return transcribe_long_audio(audio, on_partial)
+
+def _print_partial(index, total, text):
+    print(f"📝 Segment {index + 1}/{total}: {text}")
+
+def archive_audio(flac_data):
+    os.makedirs(AUDIO_FOLDER, exist_ok=True)
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    with open(os.path.join(AUDIO_FOLDER, f"audio_{timestamp}.flac"), "wb") as f:
+        f.write(flac_data)
+
+def record_and_transcribe(long_audio=False):
     recognizer = sr.Recognizer()
+    phrase_limit = 60
+    if long_audio:
+        # Voice note: tolerate pauses between sentences and record for much longer
+        recognizer.pause_threshold = 3
+        phrase_limit = LONG_AUDIO_MAX_SECONDS
     mic = sr.Microphone(sample_rate=16000)
     with mic as source:
         print("🎤 Adjusting for ambient noise...")
         recognizer.adjust_for_ambient_noise(source, duration=1)
-        print("🎤 Listening... (start speaking within 30s, max phrase 60s)")
+        print(f"🎤 Listening... (start speaking within 30s, max phrase {phrase_limit}s)")
         try:
-            audio = recognizer.listen(source, timeout=30, phrase_time_limit=60)
+            audio = recognizer.listen(source, timeout=30, phrase_time_limit=phrase_limit)
             print("✅ Voice input received.")
         except sr.WaitTimeoutError:
             raise Exception("⏰ Timeout: No speech detected within 30 seconds.")
-    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = os.path.join(AUDIO_FOLDER, f"audio_{timestamp}.wav")
-    with open(filename, "wb") as f:
-        f.write(audio.get_wav_data())
-    if os.path.getsize(filename) == 0:
+    if not audio.frame_data:
         raise Exception("❌ Error: Recorded audio is empty!")
-    return transcribe_audio_file(filename)
-
-def call_health_assistant(messages):
-    GROQ_ENDPOINT = "https://api.groq.com/openai/v1/chat/completions"
-    MODEL_NAME = "llama3-70b-8192"
-
+    audio = trim_silence(audio, recognizer.energy_threshold)
+    duration = len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+    if ARCHIVE_AUDIO:
+        archive_audio(audio.get_flac_data())
+    if duration > LONG_AUDIO_SEGMENT_SECONDS * 1.5:
+        return transcribe_long_audio(audio, on_partial=_print_partial)
+    # Trimmed and FLAC-encoded in memory: a fraction of the WAV upload on slow links
+    return transcribe_audio_bytes(audio.get_flac_data())
+
+def _groq_request(messages):
     headers = {
         "Authorization": f"Bearer {GROQ_API_KEY}",
         "Content-Type": "application/json"
@@ -98,7 +203,10 @@ def call_health_assistant(messages):
         "max_tokens": 512,
         "top_p": 0.9
     }
+    return headers, payload
 
+def call_health_assistant(messages):
+    headers, payload = _groq_request(messages)
     response = requests.post(GROQ_ENDPOINT, headers=headers, json=payload)
     result = response.json()
 
@@ -110,6 +218,111 @@ def call_health_assistant(messages):
     else:
         return "Sorry, I couldn't process that. Please try again later."
 
+# === Pipelined Reply: stream -> sentences -> translate -> TTS ===
+def stream_health_assistant(messages):
+    """
+    Yields the reply as text deltas from Groq's server-sent event stream.
+    """
+    headers, payload = _groq_request(messages)
+    payload["stream"] = True
+    with requests.post(GROQ_ENDPOINT, headers=headers, json=payload, stream=True, timeout=60) as response:
+        if response.status_code != 200:
+            print("Groq API error:", response.text)
+            yield "Sorry, there was a problem with the AI model. Please try again later."
+            return
+        for line in response.iter_lines():
+            if not line.startswith(b"data: "):
+                continue
+            data = line[len(b"data: "):]
+            if data == b"[DONE]":
+                break
+            delta = json.loads(data)["choices"][0]["delta"].get("content")
+            if delta:
+                yield delta
+
+# Sentence end: terminal punctuation (incl. the Devanagari danda) followed by whitespace, or a line break
+SENTENCE_END = re.compile(r'(?<=[.!?।])["\')\]]*\s+|\n+')
+
+def iter_sentences(deltas, min_chars=20):
+    """
+    Regroups streamed text deltas into complete sentences. Fragments shorter
+    than `min_chars` (list markers, "Dr.") are merged into the next sentence.
+    """
+    buffer = ""
+    for delta in deltas:
+        buffer += delta
+        start = 0
+        for match in SENTENCE_END.finditer(buffer):
+            sentence = buffer[start:match.end()].strip()
+            if len(sentence) >= min_chars:
+                yield sentence
+                start = match.end()
+        buffer = buffer[start:]
+    if buffer.strip():
+        yield buffer.strip()
+
+class SentenceSpeaker:
+    """
+    Speaks queued sentences in order on one background thread, so the next
+    sentence is translated while the current one is being spoken.
+    """
+
+    def __init__(self):
+        self.sentences = queue.Queue()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="sentence-speaker", daemon=True)
+        self.thread.start()
+
+    def say(self, text):
+        self.sentences.put(text)
+
+    def close(self):
+        self.sentences.put(None)  # Speak what is queued, then exit
+
+    def stop(self):
+        self.stopped.set()
+        engine.stop()
+
+    def _run(self):
+        while True:
+            text = self.sentences.get()
+            if text is None or self.stopped.is_set():
+                return
+            with speech_lock:
+                engine.say(text)
+                engine.runAndWait()
+
+def pipelined_reply(messages, user_lang):
+    """
+    Streams the English reply, translating and speaking each sentence as soon
+    as it is complete. Returns the full English reply for the chat history.
+    """
+    speaker = SentenceSpeaker()
+    print("Press 's' to stop voice output early...")
+    print("\nCareMate: ", end="", flush=True)
+    sentences = []
+    for sentence in iter_sentences(stream_health_assistant(messages)):
+        sentences.append(sentence)
+        localized = sentence if user_lang == 'en' else translate_text(sentence, target_lang=user_lang)
+        print(localized, end=" ", flush=True)
+        if keyboard.is_pressed("s") and not speaker.stopped.is_set():
+            speaker.stop()
+            print("\nVoice output stopped.")
+        if not speaker.stopped.is_set():
+            speaker.say(localized)
+    print("\n")
+    speaker.close()
+    wait_for_speech(speaker.thread, speaker.stop)
+    return " ".join(sentences)
+
+def wait_for_speech(thread, stop):
+    while thread.is_alive():
+        if keyboard.is_pressed("s"):
+            stop()
+            print("Voice output stopped.")
+            break
+        time.sleep(0.1)
+
 # === Main Loop ===
 print("CareMate AI Health Companion (Full Chat Analysis Mode)")
 print("Say or type 'analyze' to get a solution summary.\n")
@@ -118,17 +331,19 @@ chat_history = []
 
 while True:
     try:
-        mode = input("Input mode [voice/text]: ").strip().lower()
+        mode = input("Input mode [voice/long/text]: ").strip().lower()
 
         if mode == "voice":
             user_input = record_and_transcribe()
+        elif mode == "long":
+            user_input = record_and_transcribe(long_audio=True)
         elif mode == "text":
             user_input = input("You: ").strip()
         elif mode in ["exit", "quit"]:
             print("Goodbye! Stay healthy.")
             break
         else:
-            print("❓ Invalid input. Use 'voice' or 'text'.")
+            print("❓ Invalid input. Use 'voice', 'long' or 'text'.")
             continue
 
         if user_input.lower() in ["exit", "quit"]:
@@ -165,6 +380,12 @@ while True:
                 "content": "Now summarize the conversation so far as a health assistant and provide advice as per instructions."
             })
 
+        if PIPELINED_VOICE:
+            stop_speech()
+            reply = pipelined_reply(messages, user_lang)
+            chat_history.append({"role": "assistant", "content": reply})
+            continue
+
         # Get AI response
         reply = call_health_assistant(messages)
 
@@ -180,13 +401,7 @@ while True:
         stop_speech()
         thread = speak(localized_reply)
         print("Press 's' to stop voice output early...")
-
-        while thread.is_alive():
-            if keyboard.is_pressed("s"):
-                stop_speech()
-                print("Voice output stopped.")
-                break
-            time.sleep(0.1)
+        wait_for_speech(thread, stop_speech)
 
     except Exception as e:
         print(f"❌ Error: {e}")
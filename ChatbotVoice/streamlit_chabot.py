@@ -4,9 +4,12 @@ import numpy as np
 import threading
 import requests
 import time
-import tempfile
+import io
 import os
+import wave
 import pyttsx3
+from math import gcd
+from scipy.signal import resample_poly
 from dotenv import load_dotenv
 from translate import translate_text, detect_language
 import speech_recognition as sr
@@ -50,31 +53,132 @@ def call_health_assistant(messages):
     else:
         return "Error: Unable to get response from health assistant."
 
+CHAT_PROMPT = {
+    "role": "system",
+    "content": (
+        "You are CareMate, a multilingual AI health assistant helping Indian users understand symptoms and know when to seek medical care. "
+        "Ask follow-up questions, suggest safe remedies, and recommend doctor consultation when needed."
+    )
+}
+
+ANALYSIS_PROMPT = {
+    "role": "system",
+    "content": (
+        "You are CareMate, an AI health assistant. Now summarize the conversation so far and provide:\n"
+        "- Symptom summary\n"
+        "- Possible causes (no diagnosis)\n"
+        "- Safe home care tips\n"
+        "- When to consult a doctor\n"
+        "End with: 'Would you like me to continue checking your symptoms or connect you to a doctor?'"
+    )
+}
+
+# English copy of every turn, translated once when the turn is added, so
+# replaying the history to the model costs no further translation calls
+def ask_assistant(system_prompt):
+    response = call_health_assistant([system_prompt] + st.session_state.english_history)
+    st.session_state.english_history.append({"role": "assistant", "content": response})
+    localized_reply = translate_text(response, target_lang=st.session_state.language)
+    st.session_state.chat_history.append(("assistant", localized_reply))
+    speak(localized_reply)
+
+def handle_user_turn(user_input):
+    st.session_state.language = detect_language(user_input)
+    translated_input = translate_text(user_input, target_lang="en")
+    st.session_state.chat_history.append(("user", user_input))
+    st.session_state.english_history.append({"role": "user", "content": translated_input})
+    ask_assistant(CHAT_PROMPT)
+
 # Audio Processor for WebRTC
+MAX_RECORDING_SECONDS = float(os.getenv("MAX_RECORDING_SECONDS", "60"))
+RECOGNIZER_SAMPLE_RATE = 16000
+
 class AudioProcessor(AudioProcessorBase):
-    def __init__(self):
+    """
+    Captures microphone audio into an int16 ring buffer holding the last
+    `max_seconds` of speech, downmixed to mono at the source rate, so memory
+    stays fixed however long the session runs. The ring is sized from the
+    first frame's rate; the drained clip is resampled to `sample_rate` once,
+    with a polyphase anti-aliasing filter, when it is transcribed.
+    """
+
+    def __init__(self, max_seconds=MAX_RECORDING_SECONDS, sample_rate=RECOGNIZER_SAMPLE_RATE):
         self.recognizer = sr.Recognizer()
-        self.audio_data = []
+        self.max_seconds = max_seconds
+        self.sample_rate = sample_rate
+        self.source_rate = None
+        self.ring = None
+        self.write_pos = 0
+        self.filled = 0
+        self.lock = threading.Lock()
 
     def recv_audio(self, frame):
-        self.audio_data.append(frame.to_ndarray().flatten())
+        samples = frame.to_ndarray()
+        channels = len(frame.layout.channels)
+        # Packed formats interleave channels in one row; planar ones have a row per channel
+        samples = samples.T if frame.format.is_planar else samples.reshape(-1, channels)
+        mono = samples.mean(axis=1) if channels > 1 else samples[:, 0]
+        self._write(np.clip(mono, -32768, 32767).astype(np.int16), frame.sample_rate)
         return frame
 
+    def _write(self, chunk, rate):
+        with self.lock:
+            if rate != self.source_rate:
+                # First frame, or the track was renegotiated: restart at the new rate
+                self.source_rate = rate
+                self.ring = np.zeros(int(self.max_seconds * rate), dtype=np.int16)
+                self.write_pos = 0
+                self.filled = 0
+            size = len(self.ring)
+            chunk = chunk[-size:]
+            first = min(len(chunk), size - self.write_pos)
+            self.ring[self.write_pos:self.write_pos + first] = chunk[:first]
+            self.ring[:len(chunk) - first] = chunk[first:]
+            self.write_pos = (self.write_pos + len(chunk)) % size
+            self.filled = min(size, self.filled + len(chunk))
+
+    def drain(self):
+        # Captured audio in chronological order at `sample_rate`; the buffer starts empty again
+        with self.lock:
+            if self.ring is None:
+                return np.zeros(0, dtype=np.int16)
+            start = (self.write_pos - self.filled) % len(self.ring)
+            if start + self.filled <= len(self.ring):
+                audio = self.ring[start:start + self.filled].copy()
+            else:
+                audio = np.concatenate((self.ring[start:], self.ring[:self.write_pos]))
+            self.filled = 0
+            rate = self.source_rate
+        return self._resample(audio, rate)
+
+    def _resample(self, audio, rate):
+        if rate == self.sample_rate or len(audio) == 0:
+            return audio
+        divisor = gcd(self.sample_rate, rate)
+        resampled = resample_poly(audio.astype(np.float32), self.sample_rate // divisor, rate // divisor)
+        return np.clip(resampled, -32768, 32767).astype(np.int16)
+
+    def wav_bytes(self, audio):
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(self.sample_rate)
+            wav.writeframes(audio.tobytes())
+        buffer.seek(0)
+        return buffer
+
     def get_transcription(self):
-        audio_np = np.concatenate(self.audio_data).astype(np.int16)
-        audio_bytes = audio_np.tobytes()
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
-            f.write(audio_bytes)
-            filename = f.name
+        audio = self.drain()
+        if len(audio) == 0:
+            return "Error in transcription: no audio captured"
         try:
-            with sr.AudioFile(filename) as source:
+            with sr.AudioFile(self.wav_bytes(audio)) as source:
                 audio = self.recognizer.record(source)
                 text = self.recognizer.recognize_google(audio, language="hi-IN")
                 return text
         except Exception as e:
             return f"Error in transcription: {str(e)}"
-        finally:
-            os.unlink(filename)
 
 # Streamlit UI
 st.set_page_config(page_title="CareMate Health AI", layout="wide")
@@ -82,6 +186,8 @@ st.title("🤖 CareMate: AI Health Companion")
 
 if "chat_history" not in st.session_state:
     st.session_state.chat_history = []
+if "english_history" not in st.session_state:
+    st.session_state.english_history = []
 if "language" not in st.session_state:
     st.session_state.language = "en"
 
@@ -110,81 +216,17 @@ audio_processor = webrtc_streamer(
 if st.button("Send Text") and text_input.strip() != "":
     user_input = text_input.strip()
     st.session_state.text_input = ""
-    lang = detect_language(user_input)
-    st.session_state.language = lang
-    translated_input = translate_text(user_input, target_lang="en")
-    st.session_state.chat_history.append(("user", user_input))
-
-    # Prepare messages
-    system_prompt = {
-        "role": "system",
-        "content": (
-            "You are CareMate, a multilingual AI health assistant helping Indian users understand symptoms and know when to seek medical care. "
-            "Ask follow-up questions, suggest safe remedies, and recommend doctor consultation when needed."
-        )
-    }
-    messages = [system_prompt]
-    for role, content in st.session_state.chat_history:
-        role_mapping = "user" if role == "user" else "assistant"
-        translated = translate_text(content, target_lang="en") if role == "user" else content
-        messages.append({"role": role_mapping, "content": translated})
-
-    response = call_health_assistant(messages)
-    localized_reply = translate_text(response, target_lang=lang)
-    st.session_state.chat_history.append(("assistant", localized_reply))
-    speak(localized_reply)
+    handle_user_turn(user_input)
     st.rerun()
 
 # Process Mic Input
 if audio_processor and audio_processor.audio_processor:
     if st.button("Send Voice"):
         transcription = audio_processor.audio_processor.get_transcription()
-        lang = detect_language(transcription)
-        st.session_state.language = lang
-        translated_input = translate_text(transcription, target_lang="en")
-        st.session_state.chat_history.append(("user", transcription))
-
-        # Prepare messages
-        system_prompt = {
-            "role": "system",
-            "content": (
-                "You are CareMate, a multilingual AI health assistant helping Indian users understand symptoms and know when to seek medical care. "
-                "Ask follow-up questions, suggest safe remedies, and recommend doctor consultation when needed."
-            )
-        }
-        messages = [system_prompt]
-        for role, content in st.session_state.chat_history:
-            role_mapping = "user" if role == "user" else "assistant"
-            translated = translate_text(content, target_lang="en") if role == "user" else content
-            messages.append({"role": role_mapping, "content": translated})
-
-        response = call_health_assistant(messages)
-        localized_reply = translate_text(response, target_lang=lang)
-        st.session_state.chat_history.append(("assistant", localized_reply))
-        speak(localized_reply)
+        handle_user_turn(transcription)
         st.rerun()
 
 # Analysis Button
 if st.button("Analyze Conversation"):
-    system_prompt = {
-        "role": "system",
-        "content": (
-            "You are CareMate, an AI health assistant. Now summarize the conversation so far and provide:\n"
-            "- Symptom summary\n"
-            "- Possible causes (no diagnosis)\n"
-            "- Safe home care tips\n"
-            "- When to consult a doctor\n"
-            "End with: 'Would you like me to continue checking your symptoms or connect you to a doctor?'"
-        )
-    }
-    messages = [system_prompt]
-    for role, content in st.session_state.chat_history:
-        role_mapping = "user" if role == "user" else "assistant"
-        translated = translate_text(content, target_lang="en") if role == "user" else content
-        messages.append({"role": role_mapping, "content": translated})
-
-    response = call_health_assistant(messages)
-    localized_reply = translate_text(response, target_lang=st.session_state.language)
-    st.session_state.chat_history.append(("assistant", localized_reply))
-    speak(localized_reply)
+    ask_assistant(ANALYSIS_PROMPT)
     st.rerun()
@@ -0,0 +1,162 @@
+import os
+import csv
+import time
+import argparse
+from functools import partial
+from itertools import groupby
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import torch
+from cough import compute_mel_features, detect_cough_batch
+from cough_runtime import MODEL_KINDS, get_model
+from feature_store import FeatureStore, file_digest
+
+AUDIO_EXTENSIONS = ('.wav', '.flac', '.mp3', '.ogg', '.m4a')
+RESULT_FIELDS = ['file', 'cough_detected', 'cough_probability', 'frames', 'error']
+
+# === Collect Recordings ===
+def find_audio_files(input_dir):
+    files = []
+    for root, _, names in os.walk(input_dir):
+        for name in names:
+            if name.lower().endswith(AUDIO_EXTENSIONS):
+                files.append(os.path.join(root, name))
+    files.sort()
+    return files
+
+# === Feature Extraction (runs in worker processes) ===
+def _extract(file_path, **params):
+    try:
+        return file_path, compute_mel_features(file_path, **params), None
+    except Exception as e:
+        return file_path, None, str(e)
+
+# === Bucketing ===
+def iter_batches(features, batch_size, bucket_window):
+    """
+    Groups (path, spectrogram) pairs into batches of equal length.
+
+    Spectrograms are buffered `bucket_window` at a time and bucketed by
+    exact frame count. Nothing is zero-padded, so a file's prediction is
+    the same as scoring it alone, however the directory is batched.
+    """
+    window = []
+    for item in features:
+        window.append(item)
+        if len(window) >= bucket_window:
+            yield from _drain(window, batch_size)
+            window = []
+    if window:
+        yield from _drain(window, batch_size)
+
+def _frames(item):
+    return item[1].shape[1]
+
+def _drain(window, batch_size):
+    window.sort(key=_frames)
+    for _, bucket in groupby(window, key=_frames):
+        bucket = list(bucket)
+        for start in range(0, len(bucket), batch_size):
+            yield bucket[start:start + batch_size]
+
+def stack_batch(spectrograms):
+    # Equal-length (Mel, Time) spectrograms -> (N, 1, Mel, Time)
+    return torch.from_numpy(np.stack(spectrograms)[:, None].astype(np.float32, copy=False))
+
+# === Result Writers ===
+def write_results(rows, output_path):
+    if output_path.endswith('.parquet'):
+        import pandas as pd  # Optional: only needed for Parquet output
+        pd.DataFrame(rows, columns=RESULT_FIELDS).to_parquet(output_path, index=False)
+        return
+    with open(output_path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+# === Bulk Pipeline ===
+def run_batch(input_dir, output_path, workers=None, batch_size=32, threads=1, bucket_window=None,
+              store=None, model_kind='script'):
+    workers = workers or os.cpu_count() or 1
+    bucket_window = bucket_window or batch_size * 8
+    torch.set_num_threads(threads)
+
+    files = find_audio_files(input_dir)
+    print(f"🔍 Found {len(files)} recordings in {input_dir}")
+    model = get_model(model_kind)
+    rows = []
+    started = time.perf_counter()
+
+    # Recordings already in the feature store skip decoding entirely
+    cached, digests, to_extract = [], {}, files
+    if store is not None:
+        to_extract = []
+        for path in files:
+            digest = file_digest(path)
+            features = store.get(digest)
+            if features is None:
+                digests[path] = digest
+                to_extract.append(path)
+            else:
+                cached.append((path, features))
+        print(f"📦 {len(cached)} recordings served from the feature store")
+        extract = partial(_extract, n_mels=store.n_mels, sr=store.sr, hop_length=store.hop_length)
+    else:
+        extract = _extract
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        extracted = pool.map(extract, to_extract, chunksize=max(1, len(to_extract) // (workers * 4)))
+
+        def ok_features():
+            yield from cached
+            for path, features, error in extracted:
+                if error is not None:
+                    rows.append({'file': path, 'error': error})
+                    continue
+                if store is not None:
+                    store.put(digests[path], features)
+                yield path, features
+
+        for batch in iter_batches(ok_features(), batch_size, bucket_window):
+            paths = [path for path, _ in batch]
+            spectrograms = [features for _, features in batch]
+            results = detect_cough_batch(stack_batch(spectrograms), model)
+            for path, s, (pred, prob) in zip(paths, spectrograms, results):
+                rows.append({
+                    'file': path,
+                    'cough_detected': bool(pred == 1),
+                    'cough_probability': round(prob, 4),
+                    'frames': s.shape[1],
+                    'error': '',
+                })
+
+    if store is not None:
+        store.flush()
+    elapsed = time.perf_counter() - started
+    write_results(rows, output_path)
+
+    cores = workers + threads
+    files_per_sec = len(files) / elapsed if elapsed > 0 else 0.0
+    print(f"✅ Wrote {len(rows)} results to {output_path}")
+    print(f"⏱️ {len(files)} files in {elapsed:.2f}s: {files_per_sec:.2f} files/s, "
+          f"{files_per_sec / cores:.2f} files/s/core ({workers} feature workers + {threads} inference threads)")
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline cough screening over a directory of recordings.")
+    parser.add_argument('input_dir', help="Directory with patient-uploaded recordings")
+    parser.add_argument('--output', default='cough_results.csv', help="Output .csv or .parquet file")
+    parser.add_argument('--workers', type=int, default=None, help="Feature extraction processes (default: all cores)")
+    parser.add_argument('--batch-size', type=int, default=32, help="Spectrograms per CNN forward pass")
+    parser.add_argument('--threads', type=int, default=1, help="Intra-op threads for CNN inference")
+    parser.add_argument('--feature-store', default=None, help="Directory for cached mel spectrograms")
+    parser.add_argument('--model', choices=MODEL_KINDS, default='script', help="Inference model variant")
+    args = parser.parse_args()
+
+    store = FeatureStore(args.feature_store) if args.feature_store else None
+    run_batch(args.input_dir, args.output, workers=args.workers,
+              batch_size=args.batch_size, threads=args.threads, store=store,
+              model_kind=args.model)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import time
+import argparse
+import numpy as np
+import torch
+from cough_runtime import MODEL_KINDS, N_MELS, build_model
+
+# 30 s at 44.1 kHz with librosa's hop of 512 gives ~2584 frames
+DEFAULT_LENGTHS = [128, 512, 1024, 2584]
+
+def bench(model, frames, batch_size, iterations, warmup=5):
+    x = torch.rand(batch_size, 1, N_MELS, frames)
+    timings = np.empty(iterations)
+    with torch.inference_mode():
+        for _ in range(warmup):
+            model(x)
+        for i in range(iterations):
+            started = time.perf_counter()
+            model(x)
+            timings[i] = time.perf_counter() - started
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency benchmark for eager vs TorchScript vs int8 SimpleCoughCNN.")
+    parser.add_argument('--lengths', type=int, nargs='+', default=DEFAULT_LENGTHS, help="Spectrogram lengths in frames")
+    parser.add_argument('--batch-size', type=int, default=1)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=1, help="Intra-op threads")
+    args = parser.parse_args()
+
+    torch.set_num_threads(args.threads)
+    models = {kind: build_model(kind) for kind in MODEL_KINDS}
+
+    print(f"\n--- SimpleCoughCNN inference (batch {args.batch_size}, {args.threads} thread(s), "
+          f"{args.iterations} iterations, engine {torch.backends.quantized.engine}) ---")
+    print(f"{'frames':>7} {'model':<10} {'p50 ms':>9} {'p99 ms':>9} {'items/s':>10} {'vs eager':>9}")
+    for frames in args.lengths:
+        eager_p50 = None
+        for kind, model in models.items():
+            timings = bench(model, frames, args.batch_size, args.iterations)
+            p50, p99 = np.percentile(timings, [50, 99]) * 1000
+            throughput = args.batch_size * len(timings) / timings.sum()
+            eager_p50 = eager_p50 or p50
+            print(f"{frames:>7} {kind:<10} {p50:>9.3f} {p99:>9.3f} {throughput:>10.1f} {eager_p50 / p50:>8.2f}x")
+
+if __name__ == "__main__":
+    main()
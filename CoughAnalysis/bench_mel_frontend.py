@@ -0,0 +1,57 @@
+import os
+import time
+import argparse
+import tempfile
+import numpy as np
+from scipy.io.wavfile import write
+from cough import compute_mel_features
+from mel_frontend import MelFrontend
+
+# === Synthetic Recording ===
+def synth_recording(path, duration=30, fs=44100, seed=0):
+    # Background noise with a few short broadband bursts standing in for coughs
+    rng = np.random.default_rng(seed)
+    y = 0.01 * rng.standard_normal(duration * fs).astype(np.float32)
+    for start in rng.uniform(0, duration - 1, size=6):
+        i = int(start * fs)
+        burst = int(0.3 * fs)
+        y[i:i + burst] += 0.5 * rng.standard_normal(burst).astype(np.float32) * np.hanning(burst).astype(np.float32)
+    write(path, fs, y)
+    return path
+
+def time_it(fn, repeats):
+    fn()  # Warm-up (filterbank caches, FFT plans, page cache)
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return np.array(timings) * 1000
+
+# === Benchmark ===
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark librosa vs fixed-rate mel front-end.")
+    parser.add_argument('--duration', type=int, default=30, help="Recording length in seconds")
+    parser.add_argument('--fs', type=int, default=44100, help="Recording sample rate")
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = synth_recording(os.path.join(tmp, 'bench.wav'), args.duration, args.fs)
+        frontend = MelFrontend()
+        resampled = frontend.load(path)
+
+        results = {
+            f"librosa (sr=native, {args.fs} Hz)": time_it(lambda: compute_mel_features(path), args.repeats),
+            f"MelFrontend (sr={frontend.sr} Hz)": time_it(lambda: frontend.compute(path), args.repeats),
+            "MelFrontend (pre-resampled, no I/O)": time_it(lambda: frontend.features(resampled), args.repeats),
+        }
+
+    baseline = np.median(next(iter(results.values())))
+    print(f"\n--- Mel front-end benchmark ({args.duration}s recording, {args.repeats} runs) ---")
+    for name, ms in results.items():
+        print(f"{name:<40} p50 {np.median(ms):8.2f} ms   mean {ms.mean():8.2f} ms   "
+              f"speedup x{baseline / np.median(ms):.1f}")
+
+if __name__ == "__main__":
+    main()
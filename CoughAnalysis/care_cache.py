@@ -0,0 +1,85 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from cough import CARE_PROMPT_VERSION, fetch_cough_care
+
+DEFAULT_TTL = 6 * 3600  # Care guidance is generic; refresh a few times a day
+RETRY_AFTER = 60  # Seconds before a failed fetch for the same key is retried
+SEVERITY_BUCKETS = (None, 'mild', 'moderate', 'severe')
+
+FALLBACK_ADVICE = (
+    "Rest, drink warm fluids, and try steam inhalation or honey in warm water to soothe your throat. "
+    "See a doctor if the cough lasts more than 2 weeks, or if you have high fever, chest pain, "
+    "shortness of breath, or cough up blood."
+)
+
+# === Language-Keyed Care Advice Cache ===
+class CareAdviceCache:
+    """
+    Stale-while-revalidate cache of Groq cough care advice keyed by
+    (language, severity bucket, prompt version).
+
+    Hits return immediately. Entries older than `ttl` are still served while
+    a single background refresh replaces them. A cold miss serves
+    FALLBACK_ADVICE and fetches in the background, so Groq is never on the
+    request path; failed fetches are not retried for `retry_after` seconds.
+    """
+
+    def __init__(self, fetch=fetch_cough_care, ttl=DEFAULT_TTL, prompt_version=CARE_PROMPT_VERSION, workers=2,
+                 retry_after=RETRY_AFTER):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.retry_after = retry_after
+        self.prompt_version = prompt_version
+        self._entries = {}     # key -> (advice, fetched_at)
+        self._refreshing = set()
+        self._failed_at = {}   # key -> monotonic time of the last failed fetch
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="care-refresh")
+
+    def _key(self, language, severity):
+        return (language or 'en', severity if severity in SEVERITY_BUCKETS else None, self.prompt_version)
+
+    def get(self, language='en', severity=None):
+        key = self._key(language, severity)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.refresh_async(*key[:2])
+            return FALLBACK_ADVICE
+        advice, fetched_at = entry
+        if time.monotonic() - fetched_at > self.ttl:
+            self.refresh_async(*key[:2])
+        return advice
+
+    def refresh_async(self, language='en', severity=None):
+        key = self._key(language, severity)
+        with self._lock:
+            if key in self._refreshing:
+                return
+            failed_at = self._failed_at.get(key)
+            if failed_at is not None and time.monotonic() - failed_at < self.retry_after:
+                return
+            self._refreshing.add(key)
+        self._pool.submit(self._refresh, key)
+
+    def warm(self, languages=('en',), severities=SEVERITY_BUCKETS):
+        for language in languages:
+            for severity in severities:
+                self.refresh_async(language, severity)
+
+    def _refresh(self, key):
+        language, severity, _ = key
+        try:
+            advice = self.fetch(language, severity)
+        except Exception as e:
+            print(f"⚠️ Care advice refresh failed for {language}/{severity}: {e}")
+            with self._lock:
+                self._failed_at[key] = time.monotonic()
+            return None
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+        with self._lock:
+            self._failed_at.pop(key, None)
+        self._entries[key] = (advice, time.monotonic())
+        return advice
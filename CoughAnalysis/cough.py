@@ -1,4 +1,3 @@
-import sounddevice as sd
 import librosa
 import numpy as np
 import torch
@@ -7,6 +6,7 @@ from scipy.io.wavfile import write
 import requests
 import os
 from dotenv import load_dotenv
+from segmentation import detect_cough_events
 
 # === Load API Keys ===
 load_dotenv()
@@ -14,6 +14,7 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 
 # === Record 30-sec Audio ===
 def record_audio(filename='customer_cough.wav', duration=30, fs=44100):
+    import sounddevice as sd  # Needs PortAudio; only the CLI records, the server must not import it
     print("Recording started... Speak or cough naturally.")
     recording = sd.rec(int(duration * fs), samplerate=fs, channels=1)
     sd.wait()
@@ -22,13 +23,23 @@ def record_audio(filename='customer_cough.wav', duration=30, fs=44100):
     return filename
 
 # === Preprocess Audio (No Noise Reduction) ===
-def preprocess_audio(file_path):
-    y, sr = librosa.load(file_path, sr=None)
+def compute_mel_features(file_path, n_mels=64, sr=None, hop_length=512):
+    y, sr = librosa.load(file_path, sr=sr)
 
-    S = librosa.feature.melspectrogram(y=y, sr=sr, n_mels=64)
+    S = librosa.feature.melspectrogram(y=y, sr=sr, n_mels=n_mels, hop_length=hop_length)
     S_dB = librosa.power_to_db(S, ref=np.max)
 
     S_norm = (S_dB - np.min(S_dB)) / (np.max(S_dB) - np.min(S_dB))
+    return S_norm.astype(np.float32)  # (Mel, Time)
+
+def preprocess_audio(file_path, store=None, frontend=None):
+    # With a FeatureStore, audio is decoded once and re-runs read cached features
+    if store is not None:
+        S_norm = store.load(file_path)
+    elif frontend is not None:
+        S_norm = frontend.compute(file_path)  # Fixed-rate MelFrontend (mel_frontend.py)
+    else:
+        S_norm = compute_mel_features(file_path)
     S_tensor = torch.tensor(S_norm).unsqueeze(0).unsqueeze(0).float()  # (1, 1, Mel, Time)
     return S_tensor
 
@@ -50,9 +61,11 @@ class SimpleCoughCNN(nn.Module):
     def forward(self, x):
         return self.net(x)
 
-def load_model():
+def load_model(weights_path=None):
     model = SimpleCoughCNN()
     # For demo, random weights. Replace with trained model for production.
+    if weights_path:
+        model.load_state_dict(torch.load(weights_path, map_location='cpu'))
     model.eval()
     return model
 
@@ -66,8 +79,26 @@ def detect_cough(audio_tensor, model):
         else:
             return "No Cough Detected ✅"
 
+def detect_cough_batch(batch_tensor, model):
+    # batch_tensor: (N, 1, Mel, Time) -> list of (pred, cough probability)
+    with torch.inference_mode():
+        probs = torch.softmax(model(batch_tensor), dim=1)
+    cough_probs = probs[:, 1].tolist()
+    preds = probs.argmax(dim=1).tolist()
+    return list(zip(preds, cough_probs))
+
 # === Groq API for Care Instructions ===
-def get_cough_care():
+CARE_PROMPT_VERSION = 2
+
+def build_care_prompt(language='en', severity=None):
+    prompt = "A user has been detected with a cough. Suggest home remedies, when to see a doctor, and general care guidelines."
+    if severity:
+        prompt += f" The cough episode was assessed as {severity}."
+    if language != 'en':
+        prompt += f" Respond in the language with ISO code '{language}'."
+    return prompt
+
+def fetch_cough_care(language='en', severity=None, timeout=30):
     url = "https://api.groq.com/openai/v1/chat/completions"
     headers = {
         "Authorization": f"Bearer {GROQ_API_KEY}",
@@ -78,35 +109,49 @@ def get_cough_care():
         "model": "llama3-70b-8192",  # Use "mistral-7b-8k" if needed
         "messages": [
             {"role": "system", "content": "You are a healthcare assistant specialized in cough and respiratory care."},
-            {"role": "user", "content": "A user has been detected with a cough. Suggest home remedies, when to see a doctor, and general care guidelines."}
+            {"role": "user", "content": build_care_prompt(language, severity)}
         ],
         "temperature": 0.2
     }
 
-    response = requests.post(url, headers=headers, json=payload)
+    response = requests.post(url, headers=headers, json=payload, timeout=timeout)
 
     try:
         data = response.json()
     except Exception as e:
-        return f"Error: Unable to parse Groq response. {str(e)}"
+        raise Exception(f"Error: Unable to parse Groq response. {str(e)}")
 
     if response.status_code != 200:
-        return f"Groq API Error {response.status_code}: {data.get('error', {}).get('message', 'Unknown error')}"
+        raise Exception(f"Groq API Error {response.status_code}: {data.get('error', {}).get('message', 'Unknown error')}")
 
     if "choices" not in data:
-        return f"Groq API Response Error: {data}"
+        raise Exception(f"Groq API Response Error: {data}")
 
     return data['choices'][0]['message']['content']
 
+def get_cough_care(language='en', severity=None):
+    try:
+        return fetch_cough_care(language, severity)
+    except Exception as e:
+        return str(e)
+
 # === Main Pipeline ===
 def main():
     filename = record_audio()
     audio_tensor = preprocess_audio(filename)
     model = load_model()
-    result = detect_cough(audio_tensor, model)
+
+    # Only candidate acoustic events go through the CNN
+    frame_seconds = 512 / librosa.get_samplerate(filename)  # librosa's default hop
+    analysis = detect_cough_events(audio_tensor[0, 0].numpy(), model, frame_seconds=frame_seconds)
+    result = "Cough Detected 🚨" if analysis['cough_detected'] else "No Cough Detected ✅"
 
     print("\n--- Respiratory Analysis Result ---")
     print(result)
+    for event in analysis['events']:
+        if event['cough']:
+            print(f"  • Cough at {event['start']:.2f}s - {event['end']:.2f}s (p={event['probability']:.2f})")
+    print(f"  CNN ran on {analysis['frames_analyzed']} of {analysis['frames_total']} frames")
 
     if "Cough Detected" in result:
         print("\nContacting Groq AI for personalized care advice...")
@@ -0,0 +1,91 @@
+import os
+import copy
+import threading
+import torch
+import torch.nn as nn
+from torch.ao.quantization import QuantStub, DeQuantStub, fuse_modules, get_default_qconfig, prepare, convert
+from cough import load_model
+
+MODEL_KINDS = ('eager', 'script', 'quantized')
+MODEL_DIR = os.getenv("COUGH_MODEL_DIR", "cough_artifacts")
+MODEL_WEIGHTS = os.getenv("COUGH_MODEL_WEIGHTS")
+N_MELS = 64
+
+# === Static int8 Quantization ===
+class QuantizableCoughCNN(nn.Module):
+    # SimpleCoughCNN with quant/dequant stubs around the same layer stack
+    def __init__(self, model):
+        super(QuantizableCoughCNN, self).__init__()
+        self.quant = QuantStub()
+        self.net = copy.deepcopy(model.net)
+        self.dequant = DeQuantStub()
+
+    def forward(self, x):
+        return self.dequant(self.net(self.quant(x)))
+
+def calibration_batches(lengths=(256, 1024, 2584), n_mels=N_MELS, seed=0):
+    # Inputs are min-max normalized spectrograms, so uniform [0, 1] covers the observed range
+    generator = torch.Generator().manual_seed(seed)
+    return [torch.rand(4, 1, n_mels, t, generator=generator) for t in lengths]
+
+def quantize_model(model, calibration=None):
+    qmodel = QuantizableCoughCNN(model).eval()
+    fuse_modules(qmodel.net, [['0', '1'], ['3', '4']], inplace=True)  # Conv2d + ReLU
+    qmodel.qconfig = get_default_qconfig(torch.backends.quantized.engine)
+    prepare(qmodel, inplace=True)
+    with torch.inference_mode():
+        for batch in calibration or calibration_batches():
+            qmodel(batch)
+    convert(qmodel, inplace=True)
+    return qmodel
+
+# === TorchScript Export ===
+def script_model(model):
+    scripted = torch.jit.script(model.eval())
+    return torch.jit.optimize_for_inference(torch.jit.freeze(scripted))
+
+def build_model(kind, weights_path=MODEL_WEIGHTS):
+    if kind not in MODEL_KINDS:
+        raise ValueError(f"Unknown model kind '{kind}'. Use one of {MODEL_KINDS}.")
+    model = load_model(weights_path)
+    if kind == 'script':
+        return script_model(model)
+    if kind == 'quantized':
+        return torch.jit.freeze(torch.jit.script(quantize_model(model)))
+    return model
+
+def export_artifacts(model_dir=MODEL_DIR, weights_path=MODEL_WEIGHTS):
+    os.makedirs(model_dir, exist_ok=True)
+    for kind in ('script', 'quantized'):
+        path = os.path.join(model_dir, f"cough_cnn_{kind}.pt")
+        torch.jit.save(build_model(kind, weights_path), path)
+        print(f"💾 Saved {kind} model to {path}")
+
+# === Warm Model Singleton ===
+_models = {}
+_models_lock = threading.Lock()
+
+def get_model(kind='script', model_dir=MODEL_DIR):
+    """
+    Returns a process-wide model of the given kind, built (or loaded from an
+    exported artifact) and warmed up on first use.
+    """
+    model = _models.get(kind)
+    if model is not None:
+        return model
+    with _models_lock:
+        model = _models.get(kind)
+        if model is None:
+            path = os.path.join(model_dir, f"cough_cnn_{kind}.pt")
+            if kind != 'eager' and os.path.exists(path):
+                model = torch.jit.load(path, map_location='cpu').eval()
+            else:
+                model = build_model(kind)
+            with torch.inference_mode():
+                for _ in range(2):  # First calls trigger JIT profiling / kernel selection
+                    model(torch.zeros(1, 1, N_MELS, 256))
+            _models[kind] = model
+    return model
+
+if __name__ == "__main__":
+    export_artifacts()
@@ -0,0 +1,88 @@
+import io
+import os
+import datetime
+import torch
+from flask import Flask, request, jsonify
+from flask_cors import CORS
+from care_cache import CareAdviceCache
+from cough_runtime import get_model
+from mel_frontend import get_frontend
+from micro_batcher import MicroBatcher
+from segmentation import find_events, aggregate_events
+
+MODEL_KIND = os.getenv("COUGH_MODEL_KIND", "script")
+MAX_BATCH = int(os.getenv("COUGH_MAX_BATCH", "32"))
+MAX_WAIT_MS = float(os.getenv("COUGH_MAX_WAIT_MS", "5"))
+CARE_LANGUAGES = [lang.strip() for lang in os.getenv("COUGH_CARE_LANGUAGES", "en,hi,bn,te,ta,gu").split(',')]
+torch.set_num_threads(int(os.getenv("COUGH_TORCH_THREADS", "1")))
+
+app = Flask(__name__)
+CORS(app)
+
+# Model, mel front-end and batcher are resident for the life of the process
+frontend = get_frontend()
+model = get_model(MODEL_KIND)
+batcher = MicroBatcher(model, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS)
+care_cache = CareAdviceCache()
+care_cache.warm(CARE_LANGUAGES)  # Fill every (language, severity) entry off the request path
+print(f"✅ Cough model loaded ({MODEL_KIND}), micro-batching up to {MAX_BATCH} segments / {MAX_WAIT_MS} ms")
+
+def severity_bucket(analysis):
+    if not analysis['cough_detected']:
+        return None
+    if analysis['cough_count'] <= 2:
+        return 'mild'
+    if analysis['cough_count'] <= 5:
+        return 'moderate'
+    return 'severe'
+
+@app.route('/api/analyze-cough', methods=['POST'])
+def analyze_cough():
+    """Cough detection endpoint (multipart form field 'audio')"""
+    try:
+        if 'audio' not in request.files:
+            return jsonify({'error': 'No audio file provided', 'success': False}), 400
+
+        audio_data = request.files['audio'].read()
+        if len(audio_data) == 0:
+            return jsonify({'error': 'Empty audio file', 'success': False}), 400
+
+        y = frontend.load(io.BytesIO(audio_data))
+        spec = frontend.features(y)
+        events = find_events(spec)
+        probs = batcher.infer([spec[:, start:end] for start, end in events])
+
+        frame_seconds = frontend.hop_length / frontend.sr
+        analysis = aggregate_events(events, probs, spec.shape[1], frame_seconds)
+        severity = severity_bucket(analysis)
+        language = request.form.get('language', 'en')
+        if language not in CARE_LANGUAGES:
+            language = 'en'  # Bounded cache keys; never interpolate arbitrary input into the prompt
+        care_advice = care_cache.get(language, severity) if analysis['cough_detected'] else None
+
+        return jsonify({
+            'coughDetected': analysis['cough_detected'],
+            'confidence': analysis['confidence'],
+            'severity': severity,
+            'coughCount': analysis['cough_count'],
+            'events': [e for e in analysis['events'] if e['cough']],
+            'analysis': "Cough Detected 🚨" if analysis['cough_detected'] else "No Cough Detected ✅",
+            'careAdvice': care_advice,
+            'language': language,
+            'audioFeatures': {'duration': round(len(y) / frontend.sr, 2)},
+            'success': True,
+            'timestamp': datetime.datetime.now().isoformat()
+        })
+
+    except Exception as e:
+        print(f"❌ Cough analysis error: {e}")
+        return jsonify({'error': f'Cough analysis failed: {str(e)}', 'success': False}), 500
+
+@app.route('/api/analyze-cough/stats', methods=['GET'])
+def cough_stats():
+    """Micro-batching scheduler metrics"""
+    return jsonify({'model': MODEL_KIND, **batcher.stats()})
+
+if __name__ == '__main__':
+    print("🚀 Cough analysis service running on http://localhost:5001")
+    app.run(host='0.0.0.0', port=5001, threaded=True)
@@ -0,0 +1,128 @@
+import os
+import json
+import atexit
+import hashlib
+import threading
+import numpy as np
+from cough import compute_mel_features
+
+INDEX_FILE = 'index.json'
+
+# === Content Hashing ===
+def file_digest(file_path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+# === Memory-Mapped Feature Store ===
+class FeatureStore:
+    """
+    Normalized mel spectrograms keyed by audio content hash.
+
+    Each feature configuration (n_mels, sample rate, hop) gets its own
+    directory of `.npy` shards plus an `index.json` mapping digest ->
+    (shard, offset, frames). Shards are stored as (frames, n_mels) and opened
+    with mmap, so a lookup returns a (Mel, Time) view without copying or
+    decoding the audio again.
+    """
+
+    def __init__(self, root, n_mels=64, sr=None, hop_length=512, shard_size=256):
+        self.n_mels = n_mels
+        self.sr = sr
+        self.hop_length = hop_length
+        self.shard_size = shard_size
+        self.params_tag = f"mels{n_mels}-sr{sr or 'native'}-hop{hop_length}"
+        self.directory = os.path.join(root, self.params_tag)
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._shards = {}   # shard id -> memory-mapped array
+        self._pending = []  # (digest, features) not yet written to a shard
+        self._pending_index = {}
+        self._index = self._read_index()
+        # A short run never fills a shard; write whatever is pending on shutdown
+        atexit.register(self.flush)
+
+    def _read_index(self):
+        path = os.path.join(self.directory, INDEX_FILE)
+        if not os.path.exists(path):
+            return {'params': self.params_tag, 'next_shard': 0, 'entries': {}}
+        with open(path) as f:
+            return json.load(f)
+
+    def _write_index(self):
+        path = os.path.join(self.directory, INDEX_FILE)
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self._index, f)
+        os.replace(tmp, path)
+
+    def _shard(self, shard_id):
+        shard = self._shards.get(shard_id)
+        if shard is None:
+            path = os.path.join(self.directory, f"shard_{shard_id:05d}.npy")
+            shard = np.load(path, mmap_mode='r')
+            self._shards[shard_id] = shard
+        return shard
+
+    def __len__(self):
+        return len(self._index['entries']) + len(self._pending_index)
+
+    def __contains__(self, digest):
+        return digest in self._index['entries'] or digest in self._pending_index
+
+    def get(self, digest):
+        with self._lock:
+            if digest in self._pending_index:
+                return self._pending_index[digest]
+            entry = self._index['entries'].get(digest)
+            if entry is None:
+                return None
+            shard_id, offset, frames = entry
+            return self._shard(shard_id)[offset:offset + frames].T
+
+    def put(self, digest, features):
+        with self._lock:
+            if digest in self._pending_index or digest in self._index['entries']:
+                return
+            features = np.asarray(features, dtype=np.float32)
+            self._pending.append((digest, features))
+            self._pending_index[digest] = features
+            if len(self._pending) >= self.shard_size:
+                self._flush_locked()
+
+    def load(self, file_path):
+        digest = file_digest(file_path)
+        features = self.get(digest)
+        if features is None:
+            features = compute_mel_features(file_path, n_mels=self.n_mels,
+                                            sr=self.sr, hop_length=self.hop_length)
+            self.put(digest, features)
+        return features
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._pending:
+            return
+        shard_id = self._index['next_shard']
+        blocks = [features.T for _, features in self._pending]
+        path = os.path.join(self.directory, f"shard_{shard_id:05d}.npy")
+        tmp = path + '.tmp.npy'
+        np.save(tmp, np.ascontiguousarray(np.concatenate(blocks, axis=0)))
+        os.replace(tmp, path)
+
+        offset = 0
+        for digest, features in self._pending:
+            frames = features.shape[1]
+            self._index['entries'][digest] = [shard_id, offset, frames]
+            offset += frames
+        self._index['next_shard'] = shard_id + 1
+        self._write_index()
+
+        self._pending = []
+        self._pending_index = {}
@@ -0,0 +1,95 @@
+import threading
+from functools import lru_cache
+from math import gcd
+import numpy as np
+import librosa
+import soundfile as sf
+from scipy.signal import get_window, resample_poly
+from numpy.lib.stride_tricks import sliding_window_view
+
+# === Fixed-Rate Mel Front-End ===
+class MelFrontend:
+    """
+    Mel spectrogram front-end for cough screening at a fixed sample rate.
+
+    The mel filterbank and Hann window are built once. Each call runs
+    framing -> STFT -> mel -> dB -> [0, 1] normalization over reused buffers,
+    with a single max/min reduction instead of librosa's repeated passes.
+    """
+
+    def __init__(self, sr=16000, n_fft=1024, hop_length=256, n_mels=64, top_db=80.0, amin=1e-10):
+        self.sr = sr
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.n_mels = n_mels
+        self.top_db = top_db
+        self.amin = amin
+        self.mel_basis = librosa.filters.mel(sr=sr, n_fft=n_fft, n_mels=n_mels).astype(np.float32)
+        self.window = get_window('hann', n_fft, fftbins=True).astype(np.float32)
+        self._local = threading.local()  # Scratch buffers are per thread, so no locking
+
+    def _buffer(self, name, shape, dtype=np.float32):
+        # Grow-only scratch space; calls on shorter clips reuse a prefix
+        buffers = self._local.__dict__
+        buf = buffers.get(name)
+        if buf is None or buf.shape[1:] != shape[1:] or buf.shape[0] < shape[0]:
+            buf = np.empty(shape, dtype=dtype)
+            buffers[name] = buf
+        return buf[:shape[0]]
+
+    def load(self, source):
+        try:
+            y, sr = sf.read(source, dtype='float32', always_2d=True)
+        except RuntimeError:  # LibsndfileError: unrecognised format
+            # Browser uploads are WebM/Opus (MediaRecorder), which libsndfile cannot read
+            y, sr = self._decode_compressed(source)
+        y = y.mean(axis=1) if y.shape[1] > 1 else y[:, 0]
+        if sr != self.sr:
+            g = gcd(sr, self.sr)
+            y = resample_poly(y, self.sr // g, sr // g).astype(np.float32)
+        return y
+
+    @staticmethod
+    def _decode_compressed(source):
+        from pydub import AudioSegment  # ffmpeg-backed; only needed for compressed containers
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        segment = AudioSegment.from_file(source).set_sample_width(2)
+        samples = np.array(segment.get_array_of_samples(), dtype=np.float32) / 32768.0
+        return samples.reshape(-1, segment.channels), segment.frame_rate
+
+    def features(self, y):
+        pad = self.n_fft // 2
+        y = np.pad(y, pad, mode='constant')
+        frames = sliding_window_view(y, self.n_fft)[::self.hop_length]
+        n_frames = frames.shape[0]
+
+        windowed = self._buffer('windowed', (n_frames, self.n_fft))
+        np.multiply(frames, self.window, out=windowed)
+        spectrum = np.fft.rfft(windowed, axis=1)
+
+        power = self._buffer('power', (n_frames, self.n_fft // 2 + 1))
+        np.abs(spectrum, out=power)
+        np.square(power, out=power)
+
+        mel = np.matmul(power, self.mel_basis.T, out=self._buffer('mel', (n_frames, self.n_mels)))
+        np.maximum(mel, self.amin, out=mel)
+        np.log10(mel, out=mel)
+        mel *= 10.0
+
+        # ref=max and top_db clipping, then min-max scaling in one sweep
+        peak = mel.max()
+        floor = max(mel.min(), peak - self.top_db)
+        span = peak - floor
+        np.maximum(mel, floor, out=mel)
+        mel -= floor
+        if span > 0:
+            mel /= span
+        return mel.T.copy()  # (Mel, Time), detached from the scratch buffers
+
+    def compute(self, source):
+        return self.features(self.load(source))
+
+@lru_cache(maxsize=None)
+def get_frontend(sr=16000, n_fft=1024, hop_length=256, n_mels=64):
+    return MelFrontend(sr=sr, n_fft=n_fft, hop_length=hop_length, n_mels=n_mels)
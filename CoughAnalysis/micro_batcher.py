@@ -0,0 +1,96 @@
+import time
+import queue
+import threading
+from concurrent.futures import Future
+import torch
+from segmentation import pad_segments, SEGMENT_FRAMES
+
+# === Micro-Batching Scheduler ===
+class MicroBatcher:
+    """
+    Collects spectrogram segments from concurrent requests for up to
+    `max_wait_ms`, runs them through the resident model as one batch and
+    resolves each request's Future with its own cough probabilities.
+
+    Every segment is padded to the same `frames`, never to the longest
+    segment in the batch, so a request's probabilities are identical to
+    running it alone, whatever else is in flight.
+    """
+
+    def __init__(self, model, max_batch=32, max_wait_ms=5, frames=SEGMENT_FRAMES):
+        self.model = model
+        self.frames = frames
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.segments = 0
+        self.requests = 0
+        self._worker = threading.Thread(target=self._run, name="cough-micro-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, segments):
+        future = Future()
+        if not segments:
+            future.set_result([])
+            return future
+        longest = max(seg.shape[1] for seg in segments)
+        if longest > self.frames:
+            # Rejected here so it cannot fail the other requests batched with it
+            future.set_exception(ValueError(f"Segment of {longest} frames exceeds {self.frames}"))
+            return future
+        self._queue.put((segments, future))
+        return future
+
+    def infer(self, segments, timeout=30):
+        return self.submit(segments).result(timeout=timeout)
+
+    def _collect(self):
+        jobs = [self._queue.get()]
+        size = len(jobs[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                job = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            jobs.append(job)
+            size += len(job[0])
+        return jobs
+
+    def _run(self):
+        while True:
+            jobs = self._collect()
+            segments = [seg for job_segments, _ in jobs for seg in job_segments]
+            try:
+                with torch.inference_mode():
+                    probs = torch.softmax(self.model(pad_segments(segments, self.frames)), dim=1)[:, 1].tolist()
+            except Exception as e:
+                for _, future in jobs:
+                    future.set_exception(e)
+                continue
+
+            offset = 0
+            for job_segments, future in jobs:
+                future.set_result(probs[offset:offset + len(job_segments)])
+                offset += len(job_segments)
+
+            with self._stats_lock:
+                self.batches += 1
+                self.segments += len(segments)
+                self.requests += len(jobs)
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                'queue_depth': self._queue.qsize(),
+                'batches': self.batches,
+                'requests': self.requests,
+                'segments': self.segments,
+                'avg_requests_per_batch': round(self.requests / self.batches, 2) if self.batches else 0.0,
+                'avg_segments_per_batch': round(self.segments / self.batches, 2) if self.batches else 0.0,
+            }
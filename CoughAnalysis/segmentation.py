@@ -0,0 +1,113 @@
+import numpy as np
+import torch
+
+MIN_CNN_FRAMES = 8  # Two pooling-safe conv blocks need a few frames of context
+# Every segment is zero-padded to this length, so a segment's score never
+# depends on what else shares its batch (the CNN's biased convs and global
+# average pool turn padding into non-zero activations)
+SEGMENT_FRAMES = 128
+
+# === Frame-Level Activity ===
+def _robust_z(x):
+    median = np.median(x)
+    mad = np.median(np.abs(x - median)) * 1.4826
+    return (x - median) / (mad + 1e-6)
+
+def activity_score(spec, smooth_frames=3):
+    """
+    Per-frame onset/activity score from a (Mel, Time) normalized spectrogram.
+
+    Short-time energy is the mean level across mel bands, spectral flux the
+    sum of positive band-wise increases from the previous frame. Both are
+    robust z-scored against the recording itself, so the background level of
+    each recording sets its own threshold.
+    """
+    energy = spec.mean(axis=0)
+    flux = np.maximum(np.diff(spec, axis=1, prepend=spec[:, :1]), 0).sum(axis=0)
+    score = _robust_z(energy) + 0.5 * _robust_z(flux)
+    if smooth_frames > 1:
+        score = np.convolve(score, np.ones(smooth_frames) / smooth_frames, mode='same')
+    return score
+
+# === Event Segmentation ===
+def find_events(spec, threshold=2.5, min_frames=5, merge_gap=8, context=4, max_frames=SEGMENT_FRAMES):
+    """
+    Returns candidate acoustic events as (start, end) frame ranges.
+    """
+    active = activity_score(spec) > threshold
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], active.astype(np.int8), [0]))))
+    runs = edges.reshape(-1, 2)  # [start, end) pairs of active frames
+    if len(runs) == 0:
+        return []
+
+    # Merge runs separated by short gaps (e.g. the two phases of one cough)
+    merged = [list(runs[0])]
+    for start, end in runs[1:]:
+        if start - merged[-1][1] <= merge_gap:
+            merged[-1][1] = end
+        else:
+            merged.append([start, end])
+
+    n_frames = spec.shape[1]
+    events = []
+    for start, end in merged:
+        if end - start < min_frames:
+            continue
+        start, end = max(0, start - context), min(n_frames, end + context)
+        for chunk_start in range(start, end, max_frames):
+            events.append((int(chunk_start), int(min(end, chunk_start + max_frames))))
+    return events
+
+# === Event-Level Classification ===
+def pad_segments(segments, frames=SEGMENT_FRAMES):
+    frames = max(MIN_CNN_FRAMES, frames)
+    longest = max(seg.shape[1] for seg in segments)
+    if longest > frames:
+        raise ValueError(f"Segment of {longest} frames exceeds the fixed length of {frames}")
+    batch = np.zeros((len(segments), 1, segments[0].shape[0], frames), dtype=np.float32)
+    for i, seg in enumerate(segments):
+        batch[i, 0, :, :seg.shape[1]] = seg
+    return torch.from_numpy(batch)
+
+def aggregate_events(events, probs, n_frames, frame_seconds=None, threshold=0.5):
+    """
+    Combines per-event cough probabilities into a recording-level result.
+    """
+    result = {
+        'cough_detected': False,
+        'confidence': 0.0,
+        'events': [],
+        'frames_analyzed': sum(end - start for start, end in events),
+        'frames_total': int(n_frames),
+        'cough_count': 0,
+    }
+    for (start, end), prob in zip(events, probs):
+        event = {'start_frame': start, 'end_frame': end, 'probability': round(prob, 4),
+                 'cough': prob >= threshold}
+        if frame_seconds:
+            event['start'] = round(start * frame_seconds, 3)
+            event['end'] = round(end * frame_seconds, 3)
+        result['events'].append(event)
+
+    if probs:
+        result['confidence'] = round(max(probs), 4)
+        result['cough_detected'] = result['confidence'] >= threshold
+        result['cough_count'] = sum(event['cough'] for event in result['events'])
+    return result
+
+def classify_events(spec, model, events, frame_seconds=None, threshold=0.5, frames=SEGMENT_FRAMES):
+    """
+    Runs only the candidate segments through the CNN in one batch, each
+    padded to the same fixed `frames`.
+    """
+    probs = []
+    if events:
+        batch = pad_segments([spec[:, start:end] for start, end in events], frames)
+        with torch.inference_mode():
+            probs = torch.softmax(model(batch), dim=1)[:, 1].tolist()
+    return aggregate_events(events, probs, spec.shape[1], frame_seconds, threshold)
+
+def detect_cough_events(spec, model, frame_seconds=None, threshold=0.5, **segment_kwargs):
+    spec = np.asarray(spec, dtype=np.float32)
+    return classify_events(spec, model, find_events(spec, **segment_kwargs), frame_seconds, threshold,
+                           segment_kwargs.get('max_frames', SEGMENT_FRAMES))
@@ -0,0 +1,58 @@
+import os
+import threading
+from itertools import groupby
+from operator import itemgetter
+from datetime import datetime, timedelta
+from pymongo import ASCENDING, DESCENDING
+from anomaly import AnomalyDetector
+from db import db, BufferedWriter
+from rollups import daily_rollups, period_start, on_symptom_event
+
+# Days of daily rollups replayed into the detector at start-up (about two baseline time constants)
+ANOMALY_REBUILD_DAYS = int(os.getenv("ANOMALY_REBUILD_DAYS", "28"))
+
+patient_alerts = db['patient_alerts']
+alert_writer = BufferedWriter(patient_alerts, name="patient-alert-writer")
+# Per process: see AnomalyDetector for what that means behind several workers
+detector = AnomalyDetector()
+
+def ensure_indexes():
+    patient_alerts.create_index([('created_at', DESCENDING)], name='created_at')
+    patient_alerts.create_index([('phone', 1), ('created_at', DESCENDING)], name='phone_created_at')
+
+def rebuild_detector(days=ANOMALY_REBUILD_DAYS):
+    """
+    Restores every recently active patient's detector state from the daily
+    rollups, so a restart or deploy does not send them back into warm-up.
+    """
+    since = period_start(datetime.now() - timedelta(days=days), 'day')
+    cursor = (daily_rollups
+              .find({'start': {'$gte': since}},
+                    {'_id': 0, 'phone': 1, 'last_at': 1, 'count': 1, 'emergencies': 1, 'terms': 1})
+              .sort([('phone', ASCENDING), ('start', ASCENDING)]))
+    patients = 0
+    for phone, rollups in groupby(cursor, key=itemgetter('phone')):
+        detector.restore(phone, [(r['last_at'].timestamp(), r.get('count', 0), r.get('emergencies', 0),
+                                  r.get('terms', {})) for r in rollups])
+        patients += 1
+    print(f"🚩 Anomaly detector restored for {patients} patients from {days} days of rollups")
+
+def observe_event(event):
+    detector.observe(event['phone'], event['date'].timestamp(), event['emergency'], event['terms'])
+
+on_symptom_event(observe_event)
+
+def _drain():
+    # Alert consumer: persists queued alerts for dashboards and care teams
+    while True:
+        alert = detector.alerts.get()
+        alert['created_at'] = datetime.fromtimestamp(alert.pop('timestamp'))
+        print(f"🚩 {alert['kind']} alert for {alert['phone']}")
+        alert_writer.write(alert)
+
+threading.Thread(target=_drain, name="patient-alert-consumer", daemon=True).start()
+
+def recent_alerts(phone=None, limit=50):
+    query = {'phone': phone} if phone else {}
+    cursor = patient_alerts.find(query, {'_id': 0}).sort('created_at', DESCENDING).limit(limit)
+    return list(cursor)
@@ -0,0 +1,154 @@
+import math
+import queue
+import threading
+import zlib
+
+DAY = 86400.0
+
+FAST_TAU_DAYS = 1.0      # Recent message rate
+SLOW_TAU_DAYS = 14.0     # Baseline message rate
+EMERGENCY_TAU_DAYS = 3.0
+RATE_RATIO = 4.0         # Recent rate must be this many times the baseline...
+MIN_FAST_RATE = 5.0      # ...and at least this many messages per day
+EMERGENCY_THRESHOLD = 2.0
+WARMUP_EVENTS = 10       # Events seen before a patient can raise alerts...
+WARMUP_DAYS = 3.0        # ...and days since their first event (rate and new-term alerts)
+ALERT_COOLDOWN_DAYS = 1.0
+SKETCH_BITS = 256
+SKETCH_HASHES = 3
+SKETCH_MASK = (1 << SKETCH_BITS) - 1
+
+def _term_bits(term):
+    # Bloom filter positions for a term, packed into one int mask
+    h = zlib.crc32(term.encode())
+    h2 = (h >> 16) | 1
+    bits = 0
+    for i in range(SKETCH_HASHES):
+        bits |= 1 << ((h + i * h2) % SKETCH_BITS)
+    return bits
+
+# === Per-Patient State ===
+class PatientState:
+    """
+    Constant-size streaming state for one patient: time-decayed message
+    rates at two horizons, a decayed emergency count, and a 256-bit Bloom
+    sketch of symptom terms seen so far.
+    """
+    __slots__ = ('first_day', 'last_day', 'fast_rate', 'slow_rate', 'emergencies', 'count', 'terms',
+                 'rate_alert_day', 'emergency_alert_day', 'term_alert_day')
+
+    def __init__(self, day):
+        self.first_day = day
+        self.last_day = day
+        self.fast_rate = 0.0
+        self.slow_rate = 0.0
+        self.emergencies = 0.0
+        self.count = 0
+        self.terms = 0
+        self.rate_alert_day = -math.inf
+        self.emergency_alert_day = -math.inf
+        self.term_alert_day = -math.inf
+
+# === Streaming Detector ===
+class AnomalyDetector:
+    """
+    Updates a patient's state in O(1) per symptom event and emits alerts for
+    rising message frequency, repeated emergency red flags, and symptom
+    terms the patient has not mentioned before. Alerts go to `self.alerts`.
+
+    Both rates start at zero, so they are bias-corrected by
+    1 - exp(-elapsed / tau) before comparison; otherwise a new patient's
+    first busy day would look like a spike over a near-zero baseline.
+    Safe to call from several threads.
+
+    State lives in this process only. A restart would put every patient
+    back into warm-up, so `restore` rebuilds it from daily rollups at
+    start-up. Behind several worker processes each detector only sees the
+    events its process handles after that, so live rates are underestimated
+    by roughly the number of processes.
+    """
+
+    def __init__(self, alert_queue=None):
+        self.states = {}
+        self.alerts = alert_queue if alert_queue is not None else queue.Queue(maxsize=10000)
+        self.dropped_alerts = 0
+        self._lock = threading.Lock()
+
+    def observe(self, phone, timestamp, emergency=False, terms=()):
+        with self._lock:
+            alerts = self._update(phone, timestamp, emergency, terms)
+        for kind, details in alerts:
+            self._emit({'phone': phone, 'kind': kind, 'timestamp': timestamp, **details})
+        return alerts or None
+
+    def restore(self, phone, days):
+        """
+        Rebuilds a patient's state from daily totals, oldest first, as
+        (timestamp of the day's last event, messages, emergencies, terms).
+        A day's messages are treated as arriving together at that timestamp.
+        Replaces any state held for the phone; alert cooldowns start fresh.
+        """
+        state = None
+        for timestamp, count, emergencies, terms in days:
+            day = timestamp / DAY
+            if state is None:
+                state = PatientState(day)
+            dt = max(0.0, day - state.last_day)
+            state.last_day = day
+            state.count += count
+            state.fast_rate = state.fast_rate * math.exp(-dt / FAST_TAU_DAYS) + count / FAST_TAU_DAYS
+            state.slow_rate = state.slow_rate * math.exp(-dt / SLOW_TAU_DAYS) + count / SLOW_TAU_DAYS
+            state.emergencies = state.emergencies * math.exp(-dt / EMERGENCY_TAU_DAYS) + emergencies
+            for term in terms:
+                state.terms |= _term_bits(term)
+        if state is not None:
+            with self._lock:
+                self.states[phone] = state
+
+    def _update(self, phone, timestamp, emergency, terms):
+        day = timestamp / DAY
+        state = self.states.get(phone)
+        if state is None:
+            state = self.states[phone] = PatientState(day)
+
+        dt = max(0.0, day - state.last_day)
+        state.last_day = day
+        state.count += 1
+        # Decayed event counts divided by tau estimate events per day
+        state.fast_rate = state.fast_rate * math.exp(-dt / FAST_TAU_DAYS) + 1.0 / FAST_TAU_DAYS
+        state.slow_rate = state.slow_rate * math.exp(-dt / SLOW_TAU_DAYS) + 1.0 / SLOW_TAU_DAYS
+        state.emergencies = state.emergencies * math.exp(-dt / EMERGENCY_TAU_DAYS) + (1.0 if emergency else 0.0)
+
+        new_terms = []
+        for term in terms:
+            bits = _term_bits(term)
+            if state.terms & bits != bits:
+                new_terms.append(term)
+                state.terms |= bits
+
+        if state.count <= WARMUP_EVENTS:
+            return []
+
+        alerts = []
+        elapsed = day - state.first_day
+        warmed_up = elapsed >= WARMUP_DAYS
+        if warmed_up and day - state.rate_alert_day >= ALERT_COOLDOWN_DAYS:
+            fast_rate = state.fast_rate / -math.expm1(-elapsed / FAST_TAU_DAYS)
+            slow_rate = state.slow_rate / -math.expm1(-elapsed / SLOW_TAU_DAYS)
+            if fast_rate >= MIN_FAST_RATE and fast_rate >= RATE_RATIO * slow_rate:
+                state.rate_alert_day = day
+                alerts.append(('rising_frequency', {'recent_per_day': round(fast_rate, 2),
+                                                    'baseline_per_day': round(slow_rate, 2)}))
+        if state.emergencies >= EMERGENCY_THRESHOLD and day - state.emergency_alert_day >= ALERT_COOLDOWN_DAYS:
+            state.emergency_alert_day = day
+            alerts.append(('repeated_emergency', {'recent_emergencies': round(state.emergencies, 2)}))
+        if warmed_up and new_terms and day - state.term_alert_day >= ALERT_COOLDOWN_DAYS:
+            state.term_alert_day = day
+            alerts.append(('new_symptom', {'terms': new_terms}))
+        return alerts
+
+    def _emit(self, alert):
+        try:
+            self.alerts.put_nowait(alert)
+        except queue.Full:
+            self.dropped_alerts += 1
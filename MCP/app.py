@@ -2,16 +2,31 @@ from flask import Flask
 from flask_cors import CORS
 from apscheduler.schedulers.background import BackgroundScheduler
 from routes import register_routes
-from scheduler import send_daily_checkin
+from scheduler import send_daily_checkin, init_checkins, CHECKIN_POLL_MINUTES
+from db import ensure_indexes
+import idempotency
+import rollups
+import leader
+import alerts
 
 app = Flask(__name__)
 CORS(app)
 
+ensure_indexes()
+idempotency.ensure_indexes()
+rollups.ensure_collections()
+leader.ensure_indexes()
+alerts.ensure_indexes()
+alerts.rebuild_detector()
+init_checkins()
+
 register_routes(app)
 
-# Start the scheduler
+# Start the scheduler (every process runs one; a Mongo lease picks the one that does the work)
 scheduler = BackgroundScheduler()
-scheduler.add_job(send_daily_checkin, 'cron', hour=9)  # 9 AM daily
+# Each patient is due once a day inside the check-in window; polling picks up whoever is due
+scheduler.add_job(leader.run_exclusively('daily_checkin')(send_daily_checkin),
+                  'interval', minutes=CHECKIN_POLL_MINUTES, max_instances=1, coalesce=True)
 scheduler.start()
 
 if __name__ == '__main__':
@@ -0,0 +1,46 @@
+from mistral_client import call_health_assistant
+from translate_client import detect_language
+from db import save_symptom_log
+from health_logic import find_red_flags, emergency_template, emergency_language
+from conversation import conversation_cache
+
+EMERGENCY_NOTE = "\n\n⚠️ Your symptoms may be serious. Please visit a doctor immediately."
+
+def build_system_prompt(language):
+    return {
+        "role": "system",
+        "content": f"""You are CareMate, a multilingual AI health assistant.
+
+- Respond only in {language.upper()}
+- Be empathetic and culturally relevant
+- Suggest safe home remedies
+- Advise when to see a doctor
+- Do NOT prescribe medicines
+- End every response with: "Would you like me to continue checking your symptoms or help connect you to a doctor?" """
+    }
+
+def generate_reply(phone, message, language=None, on_emergency=None, timezone=None, use_history=False):
+    """
+    Runs one assistant turn: LLM reply, emergency note and symptom log.
+    Red flags are checked before the LLM call; `on_emergency(template)` lets
+    the caller deliver an immediate templated warning while the full reply is
+    still being generated. `timezone` (IANA name), when the client knows it,
+    is stored on the patient for check-in scheduling. Set `use_history` only
+    when `phone` is authenticated (Twilio's `From`): the patient's earlier
+    turns are fed to the model. Returns (reply, language).
+    """
+    language = language or detect_language(message)
+    flags = find_red_flags(message)
+    emergency = bool(flags)
+    if emergency and on_emergency:
+        on_emergency(emergency_template(emergency_language(flags, language)))
+
+    history = conversation_cache.messages(phone) if phone and use_history else []
+    messages = [build_system_prompt(language)] + history + [{"role": "user", "content": message}]
+    reply = call_health_assistant(messages)
+
+    if emergency:
+        reply += EMERGENCY_NOTE
+
+    save_symptom_log(phone, message, language, reply, timezone=timezone)
+    return reply, language
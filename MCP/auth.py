@@ -0,0 +1,23 @@
+import os
+import hmac
+import functools
+from flask import request, jsonify
+
+# Shared secret for dashboard and care-team reads of patient data
+ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN", "")
+
+def require_admin_token(view):
+    """
+    Decorator for endpoints that expose patient data: the request must send
+    `Authorization: Bearer <ADMIN_API_TOKEN>`. With no token configured the
+    endpoint is disabled rather than left open.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not ADMIN_API_TOKEN:
+            return jsonify({'error': 'ADMIN_API_TOKEN is not configured', 'success': False}), 503
+        scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+        if scheme.lower() != 'bearer' or not hmac.compare_digest(token.encode(), ADMIN_API_TOKEN.encode()):
+            return jsonify({'error': 'Unauthorized', 'success': False}), 401
+        return view(*args, **kwargs)
+    return wrapper
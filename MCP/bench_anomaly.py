@@ -0,0 +1,76 @@
+import sys
+import time
+import random
+import argparse
+import tracemalloc
+from anomaly import AnomalyDetector, DAY
+
+TERMS = ['fever', 'cough', 'headache', 'cold', 'fatigue', 'body ache', 'sore throat', 'nausea']
+RARE_TERMS = ['chest pain', 'breathlessness', 'dizziness', 'vomiting']
+
+def synthetic_stream(n_events, n_patients, days, worsening_fraction, seed):
+    """
+    Yields (phone, timestamp, emergency, terms) in time order. Most patients
+    message at a steady rate about their own few chronic symptoms; a small
+    fraction escalate with new, more serious symptoms over the last week.
+    """
+    rng = random.Random(seed)
+    profiles = [rng.sample(TERMS, 3) for _ in range(n_patients)]
+    worsening = set(rng.sample(range(n_patients), int(n_patients * worsening_fraction)))
+    start = time.time() - days * DAY
+    span = days * DAY
+    escalation_start = span - 7 * DAY
+    for i in range(n_events):
+        offset = span * i / n_events
+        if offset > escalation_start and worsening and rng.random() < 0.3:
+            patient = rng.choice(tuple(worsening))
+            terms = [rng.choice(RARE_TERMS)]
+            emergency = rng.random() < 0.3
+        else:
+            patient = rng.randrange(n_patients)
+            terms = rng.sample(profiles[patient], rng.randint(0, 2))
+            emergency = rng.random() < 0.001
+        yield f"+91{patient:010d}", start + offset, emergency, terms
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the streaming symptom anomaly detector.")
+    parser.add_argument('--events', type=int, default=1_000_000)
+    parser.add_argument('--patients', type=int, default=20_000)
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--worsening', type=float, default=0.01, help="Fraction of patients who escalate")
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    events = list(synthetic_stream(args.events, args.patients, args.days, args.worsening, args.seed))
+
+    detector = AnomalyDetector(alert_queue=_CountingQueue())
+    started = time.perf_counter()
+    for phone, timestamp, emergency, terms in events:
+        detector.observe(phone, timestamp, emergency, terms)
+    elapsed = time.perf_counter() - started
+
+    # Second pass under tracemalloc, timed separately since tracing slows allocation
+    tracemalloc.start()
+    traced = AnomalyDetector(alert_queue=_CountingQueue())
+    for phone, timestamp, emergency, terms in events:
+        traced.observe(phone, timestamp, emergency, terms)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    counts = detector.alerts.counts
+    print(f"\n--- Streaming anomaly detector ({args.events:,} events, {len(detector.states):,} patients) ---")
+    print(f"Throughput : {args.events / elapsed:,.0f} events/s ({1e6 * elapsed / args.events:.2f} µs/event)")
+    print(f"State      : {peak / len(detector.states):,.0f} bytes/patient peak traced "
+          f"({sys.getsizeof(next(iter(detector.states.values())))} bytes per PatientState object)")
+    print(f"Alerts     : " + ", ".join(f"{kind}={n:,}" for kind, n in sorted(counts.items())))
+
+class _CountingQueue:
+    # Stands in for the alert queue so the benchmark measures the detector only
+    def __init__(self):
+        self.counts = {}
+
+    def put_nowait(self, alert):
+        self.counts[alert['kind']] = self.counts.get(alert['kind'], 0) + 1
+
+if __name__ == "__main__":
+    main()
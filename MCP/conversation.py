@@ -0,0 +1,62 @@
+import os
+import threading
+from collections import OrderedDict, deque
+from pymongo import DESCENDING
+from db import collection, log_writer, on_symptom_log
+
+CONVERSATION_TURNS = int(os.getenv("CONVERSATION_TURNS", "6"))
+CONVERSATION_CACHE_SIZE = int(os.getenv("CONVERSATION_CACHE_SIZE", "5000"))
+
+# === Per-Patient Conversation Context ===
+class ConversationCache:
+    """
+    LRU of the last `turns` (message, reply) pairs per phone.
+
+    A miss is warmed with one projected query on the (phone, date) index,
+    plus any logs still waiting in the buffered writer. After that,
+    save_symptom_log keeps cached entries current by writing through, so
+    later turns need no database round trip.
+    """
+
+    def __init__(self, turns=CONVERSATION_TURNS, max_patients=CONVERSATION_CACHE_SIZE):
+        self.turns = turns
+        self.max_patients = max_patients
+        self._sessions = OrderedDict()  # phone -> deque of (message, reply)
+        self._lock = threading.Lock()
+
+    def _load(self, phone):
+        cursor = (collection.find({'phone': phone}, {'_id': 0, 'symptom': 1, 'bot_reply': 1, 'date': 1})
+                  .sort('date', DESCENDING)
+                  .limit(self.turns))
+        docs = list(cursor)[::-1] + log_writer.pending(phone)
+        return deque(((d.get('symptom', ''), d.get('bot_reply', '')) for d in docs), maxlen=self.turns)
+
+    def history(self, phone):
+        with self._lock:
+            session = self._sessions.get(phone)
+            if session is not None:
+                self._sessions.move_to_end(phone)
+                return list(session)
+        session = self._load(phone)
+        with self._lock:
+            session = self._sessions.setdefault(phone, session)
+            self._sessions.move_to_end(phone)
+            if len(self._sessions) > self.max_patients:
+                self._sessions.popitem(last=False)
+            return list(session)
+
+    def record(self, doc):
+        with self._lock:
+            session = self._sessions.get(doc['phone'])
+            if session is not None:
+                session.append((doc['symptom'], doc['bot_reply']))
+
+    def messages(self, phone):
+        messages = []
+        for message, reply in self.history(phone):
+            messages.append({"role": "user", "content": message})
+            messages.append({"role": "assistant", "content": reply})
+        return messages
+
+conversation_cache = ConversationCache()
+on_symptom_log(conversation_cache.record)
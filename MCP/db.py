@@ -1,6 +1,10 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, ASCENDING, UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
 from datetime import datetime
+from zoneinfo import ZoneInfo
 import os
+import atexit
+import threading
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -11,12 +15,172 @@ MONGO_URI = os.getenv("MONGO_URI")
 if not MONGO_URI:
     raise Exception("❌ MONGO_URI is missing. Please check your .env file.")
 
+LOG_FLUSH_SIZE = int(os.getenv("LOG_FLUSH_SIZE", "100"))
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", "1.0"))  # seconds
+LOG_MAX_BUFFER = int(os.getenv("LOG_MAX_BUFFER", "10000"))
+DUPLICATE_KEY = 11000
+
 # MongoDB connection
 client = MongoClient(MONGO_URI)
 db = client['caremate']
 collection = db['symptom_logs']
+patients = db['patients']
+
+# Patients seen but not yet given a check-in slot by the scheduler
+UNSCHEDULED = datetime(1970, 1, 1)
+
+def ensure_indexes():
+    # (phone, date, _id) serves phone-only lookups and distinct('phone') as its prefix,
+    # per-patient date ranges, and keyset pagination on (date, _id) without a sort stage
+    collection.create_index([('phone', ASCENDING), ('date', ASCENDING), ('_id', ASCENDING)], name='phone_date_id')
+    patients.create_index('phone', unique=True, name='phone_unique')
+    patients.create_index([('next_checkin_at', ASCENDING), ('_id', ASCENDING)], name='next_checkin')
+    print("🗂️ symptom_logs and patients indexes ready")
+
+# Calling codes of countries with a single timezone; multi-zone codes (+1, +7, +61, ...) stay unknown
+PHONE_TIMEZONES = {
+    '+91': 'Asia/Kolkata', '+977': 'Asia/Kathmandu', '+880': 'Asia/Dhaka', '+92': 'Asia/Karachi',
+    '+94': 'Asia/Colombo', '+975': 'Asia/Thimphu', '+960': 'Indian/Maldives', '+971': 'Asia/Dubai',
+    '+966': 'Asia/Riyadh', '+974': 'Asia/Qatar', '+968': 'Asia/Muscat', '+965': 'Asia/Kuwait',
+    '+973': 'Asia/Bahrain', '+65': 'Asia/Singapore', '+60': 'Asia/Kuala_Lumpur', '+44': 'Europe/London',
+    '+49': 'Europe/Berlin', '+33': 'Europe/Paris', '+254': 'Africa/Nairobi', '+27': 'Africa/Johannesburg',
+}
+
+def timezone_for_phone(phone):
+    # Longest matching calling code (codes are 1-3 digits), or None when unknown/ambiguous
+    phone = (phone or '').strip()
+    for length in (4, 3, 2):
+        zone = PHONE_TIMEZONES.get(phone[:length])
+        if zone:
+            return zone
+    return None
+
+def valid_timezone(name):
+    try:
+        ZoneInfo(name)
+        return True
+    except Exception:
+        return False
+
+def upsert_patients(docs):
+    now = datetime.utcnow()
+    explicit = {}  # phone -> timezone supplied by the client, which overrides the phone guess
+    for doc in docs:
+        if doc.get('phone') and doc.get('timezone'):
+            explicit[doc['phone']] = doc['timezone']
+    ops = []
+    for phone in {doc['phone'] for doc in docs if doc.get('phone')}:
+        update = {'$set': {'last_seen': now},
+                  '$setOnInsert': {'created_at': now, 'next_checkin_at': UNSCHEDULED}}
+        if phone in explicit:
+            update['$set']['timezone'] = explicit[phone]
+        elif timezone_for_phone(phone):
+            update['$setOnInsert']['timezone'] = timezone_for_phone(phone)
+        ops.append(UpdateOne({'phone': phone}, update, upsert=True))
+    if ops:
+        patients.bulk_write(ops, ordered=False)
+
+def backfill_patients():
+    # One-off migration for deployments that predate the patients collection
+    upsert_patients({'phone': phone} for phone in collection.distinct('phone'))
+
+# === Buffered Bulk Writer ===
+class BufferedWriter:
+    """
+    Queues documents in memory and writes them with unordered insert_many
+    from a background thread, once `max_batch` documents are waiting or
+    `interval` seconds have passed. Anything still buffered is flushed on
+    interpreter shutdown.
+    """
+
+    def __init__(self, target, max_batch=LOG_FLUSH_SIZE, interval=LOG_FLUSH_INTERVAL, max_buffer=LOG_MAX_BUFFER,
+                 on_flush=None, name="symptom-log-writer"):
+        self.target = target
+        self.on_flush = on_flush
+        self.max_batch = max_batch
+        self.interval = interval
+        self.max_buffer = max_buffer
+        self._buffer = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, doc):
+        with self._cond:
+            self._buffer.append(doc)
+            if len(self._buffer) >= self.max_batch:
+                self._cond.notify()
+
+    def _take(self):
+        batch, self._buffer = self._buffer, []
+        return batch
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._closed or len(self._buffer) >= self.max_batch,
+                                    timeout=self.interval)
+                if self._closed:
+                    return
+                batch = self._take()
+            if batch:
+                try:
+                    self._insert(batch)
+                except Exception as e:
+                    # Never let one bad batch (e.g. InvalidDocument) kill the flusher thread
+                    print(f"❌ {self.target.name} flush dropped {len(batch)} docs: {e!r}")
+
+    def _insert(self, batch):
+        try:
+            self.target.insert_many(batch, ordered=False)
+        except BulkWriteError as e:
+            # Unordered: everything except the reported documents was written. A duplicate
+            # _id means a re-queued doc already landed on an unacknowledged attempt, so it
+            # still counts as written for the hook.
+            failed = {err['index'] for err in e.details.get('writeErrors', []) if err.get('code') != DUPLICATE_KEY}
+            print(f"⚠️ {len(failed)} {self.target.name} docs failed to insert")
+            batch = [doc for i, doc in enumerate(batch) if i not in failed]
+        except PyMongoError as e:
+            print(f"❌ {self.target.name} flush failed, re-queueing {len(batch)} docs: {e}")
+            with self._cond:
+                self._buffer[:0] = batch[:max(0, self.max_buffer - len(self._buffer))]
+            return
+        if self.on_flush and batch:
+            try:
+                self.on_flush(batch)
+            except Exception as e:
+                print(f"⚠️ Post-flush hook failed: {e!r}")
+
+    def pending(self, phone):
+        # Logs for `phone` that are queued but not yet flushed to Mongo
+        with self._cond:
+            return [doc for doc in self._buffer if doc.get('phone') == phone]
+
+    def flush(self):
+        with self._cond:
+            batch = self._take()
+        if batch:
+            self._insert(batch)
+
+    def close(self):
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout=5)
+        self.flush()
+
+log_writer = BufferedWriter(collection, on_flush=upsert_patients)
+_log_listeners = []
+
+def on_symptom_log(callback):
+    # Write-through hook: callback(doc) runs for every saved symptom log
+    _log_listeners.append(callback)
 
-def save_symptom_log(phone, symptoms, language, reply):
+def save_symptom_log(phone, symptoms, language, reply, timezone=None):
     doc = {
         'phone': phone,
         'date': datetime.now(),
@@ -24,5 +188,12 @@ def save_symptom_log(phone, symptoms, language, reply):
         'symptom': symptoms,
         'bot_reply': reply
     }
-    collection.insert_one(doc)
-    print("🗃️ Saved symptom log for", phone)
+    if timezone:
+        doc['timezone'] = timezone  # Carried to the patients upsert on flush
+    log_writer.write(doc)
+    for callback in _log_listeners:
+        try:
+            callback(doc)
+        except Exception as e:
+            print(f"⚠️ Symptom log listener failed: {e}")
+    print("🗃️ Queued symptom log for", phone)
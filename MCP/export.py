@@ -0,0 +1,81 @@
+import io
+import csv
+import json
+import zlib
+from datetime import datetime
+from bson import ObjectId
+from db import collection
+
+EXPORT_FIELDS = ('date', 'language', 'symptom', 'bot_reply')
+CHUNK_SIZE = 64 * 1024  # bytes per yielded response chunk
+
+def parse_fields(raw):
+    if not raw:
+        return EXPORT_FIELDS
+    fields = tuple(f for f in raw.split(',') if f in EXPORT_FIELDS)
+    return fields or EXPORT_FIELDS
+
+# === Keyset-Paginated Cursor ===
+def iter_patient_logs(phone, fields=EXPORT_FIELDS, after=None, after_id=None, limit=None, batch_size=500):
+    """
+    Streams a patient's symptom logs in (date, _id) order straight from a
+    Mongo cursor on the (phone, date, _id) index. Pass the last row's `date`
+    and `id` as `after` / `after_id` to resume the next page.
+    """
+    query = {'phone': phone}
+    if after is not None:
+        if after_id is not None:
+            query['$or'] = [{'date': {'$gt': after}}, {'date': after, '_id': {'$gt': ObjectId(after_id)}}]
+        else:
+            query['date'] = {'$gt': after}
+    cursor = (collection.find(query, {field: 1 for field in fields})
+              .sort([('date', 1), ('_id', 1)])
+              .batch_size(batch_size))
+    if limit:
+        cursor = cursor.limit(limit)
+    for doc in cursor:
+        row = {'id': str(doc['_id'])}
+        for field in fields:
+            value = doc.get(field)
+            row[field] = value.isoformat() if isinstance(value, datetime) else value
+        yield row
+
+# === Serializers ===
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+def csv_lines(rows, fields):
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=('id',) + tuple(fields))
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
+
+def chunked(lines, compress=False):
+    """
+    Groups text lines into ~CHUNK_SIZE byte chunks, optionally gzip-encoding
+    them incrementally, so memory stays constant for any history length.
+    """
+    gzip = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if compress else None
+    pending, size = [], 0
+    for line in lines:
+        data = line.encode('utf-8')
+        pending.append(data)
+        size += len(data)
+        if size >= CHUNK_SIZE:
+            block = b''.join(pending)
+            pending, size = [], 0
+            out = gzip.compress(block) if gzip else block
+            if out:
+                yield out
+    block = b''.join(pending)
+    if gzip:
+        yield gzip.compress(block) + gzip.flush()
+    elif block:
+        yield block
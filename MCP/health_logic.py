@@ -1,3 +1,223 @@
+import re
+import unicodedata
+
+# === Multilingual Red-Flag Lexicon ===
+# Phrases are matched case-insensitively after NFC normalization. Latin-script
+# entries (English and romanized Hindi) must start on a word boundary and may
+# end with an inflectional suffix ("chest pains", "seizures", "breathlessness");
+# Indic and Perso-Arabic entries match as substrings because inflections
+# attach directly to the stem.
+RED_FLAGS = {
+    'en': [
+        'chest pain', 'chest tightness', 'pressure in chest', 'heart attack', 'breathless',
+        'shortness of breath', 'difficulty breathing', 'trouble breathing', "can't breathe",
+        'cannot breathe', 'not breathing', 'choking', 'blue lips', 'faint', 'fainted', 'fainting',
+        'unconscious', 'passed out', 'unresponsive', 'seizure', 'convulsion', 'convulsions', 'having fits',
+        'having a fit',
+        'vomiting blood', 'coughing blood', 'coughing up blood', 'blood in vomit', 'severe bleeding',
+        'heavy bleeding', 'having a stroke', 'had a stroke', 'brain stroke', 'face drooping', 'slurred speech', 'paralysis', 'sudden weakness',
+        'suicidal', 'suicide', 'kill myself', 'overdose', 'swallowed poison', 'drank poison', 'took poison',
+        'consumed poison', 'drank pesticide', 'consumed pesticide', 'severe burn', 'snake bite',
+        'stiff neck', 'worst headache',
+    ],
+    'hi-latn': [
+        'seene me dard', 'seene mein dard', 'chhati me dard', 'chati me dard', 'saans nahi',
+        'sans nahi', 'saans lene me takleef', 'saans phool', 'behosh', 'khoon ki ulti',
+        'khoon ki ultee', 'dil ka daura', 'mirgi', 'lakwa',
+    ],
+    'hi': [
+        'सीने में दर्द', 'छाती में दर्द', 'सांस लेने में तकलीफ', 'सांस लेने में दिक्कत', 'सांस नहीं',
+        'साँस नहीं', 'सांस फूल', 'बेहोश', 'दौरा पड़', 'मिर्गी', 'खून की उल्टी', 'खून की उलटी',
+        'खांसी में खून', 'दिल का दौरा', 'लकवा', 'आत्महत्या', 'ज़हर', 'जहर',
+    ],
+    'mr': [
+        'छातीत दुखणे', 'छातीत दुखत', 'श्वास घेण्यास त्रास', 'दम लागत', 'बेशुद्ध', 'झटके',
+        'रक्ताची उलटी', 'हृदयविकाराचा झटका', 'आत्महत्या',
+    ],
+    'bn': [
+        'বুকে ব্যথা', 'শ্বাসকষ্ট', 'শ্বাস নিতে কষ্ট', 'অজ্ঞান', 'খিঁচুনি', 'রক্তবমি', 'রক্ত বমি',
+        'হার্ট অ্যাটাক', 'হৃদরোগ', 'ব্রেন স্ট্রোক', 'আত্মহত্যা', 'বিষ খেয়েছ',
+    ],
+    'te': [
+        'ఛాతీ నొప్పి', 'ఛాతి నొప్పి', 'శ్వాస ఆడటం లేదు', 'ఊపిరి ఆడటం లేదు', 'ఆయాసం',
+        'స్పృహ కోల్పో', 'మూర్ఛ', 'ఫిట్స్', 'రక్తం వాంతి', 'రక్తపు వాంతి', 'గుండెపోటు', 'పక్షవాతం',
+        'ఆత్మహత్య',
+    ],
+    'ta': [
+        'நெஞ்சு வலி', 'நெஞ்சுவலி', 'மார்பு வலி', 'மூச்சுத் திணறல்', 'மூச்சு திணறல்',
+        'மூச்சு விட முடியவில்லை', 'மயக்கம்', 'வலிப்பு', 'இரத்த வாந்தி', 'ரத்த வாந்தி',
+        'மாரடைப்பு', 'பக்கவாதம்', 'தற்கொலை',
+    ],
+    'gu': [
+        'છાતીમાં દુખાવો', 'છાતીમાં દુઃખાવો', 'શ્વાસ લેવામાં તકલીફ', 'શ્વાસ ચડ', 'બેભાન', 'આંચકી',
+        'લોહીની ઉલટી', 'હાર્ટ એટેક', 'હૃદયરોગનો હુમલો', 'લકવો', 'આત્મહત્યા',
+    ],
+    'kn': [
+        'ಎದೆ ನೋವು', 'ಎದೆನೋವು', 'ಉಸಿರಾಟದ ತೊಂದರೆ', 'ಉಸಿರುಗಟ್ಟು', 'ಪ್ರಜ್ಞೆ ತಪ್ಪಿ', 'ಮೂರ್ಛೆ',
+        'ರಕ್ತ ವಾಂತಿ', 'ಹೃದಯಾಘಾತ', 'ಪಾರ್ಶ್ವವಾಯು', 'ಆತ್ಮಹತ್ಯೆ',
+    ],
+    'ml': [
+        'നെഞ്ചുവേദന', 'നെഞ്ച് വേദന', 'ശ്വാസം മുട്ട', 'ശ്വാസതടസ്സം', 'ബോധക്ഷയം', 'ബോധം പോയി',
+        'അപസ്മാരം', 'രക്തം ഛർദ്ദി', 'ഹൃദയാഘാതം', 'പക്ഷാഘാതം', 'ആത്മഹത്യ',
+    ],
+    'pa': [
+        'ਛਾਤੀ ਵਿੱਚ ਦਰਦ', 'ਛਾਤੀ ਦਰਦ', 'ਸਾਹ ਲੈਣ ਵਿੱਚ ਤਕਲੀਫ਼', 'ਸਾਹ ਨਹੀਂ', 'ਬੇਹੋਸ਼', 'ਦੌਰਾ ਪਿਆ',
+        'ਖੂਨ ਦੀ ਉਲਟੀ', 'ਦਿਲ ਦਾ ਦੌਰਾ', 'ਅਧਰੰਗ', 'ਖ਼ੁਦਕੁਸ਼ੀ', 'ਆਤਮਹੱਤਿਆ',
+    ],
+    'or': [
+        'ଛାତି ଯନ୍ତ୍ରଣା', 'ଛାତି ବିନ୍ଧା', 'ନିଶ୍ୱାସ ନେବାରେ କଷ୍ଟ', 'ଶ୍ୱାସକଷ୍ଟ', 'ବେହୋସ', 'ଚେତା ହରାଇ',
+        'ରକ୍ତ ବାନ୍ତି', 'ହୃଦଘାତ', 'ଆତ୍ମହତ୍ୟା',
+    ],
+    'ur': [
+        'سینے میں درد', 'سانس لینے میں دشواری', 'سانس نہیں', 'بے ہوش', 'بیہوش', 'دورہ پڑ',
+        'خون کی الٹی', 'دل کا دورہ', 'فالج', 'خودکشی',
+    ],
+}
+
+# Checked at import: must all be flagged (inflected forms) / must not be (look-alikes)
+RED_FLAG_EXAMPLES = [
+    'chest pains', 'severe chest pains since morning', 'seizures', 'I am having seizures',
+    'breathlessness', 'unconsciousness', 'he fainted twice', 'my son is having convulsions', 'can’t breathe',
+    'seene mein dard hai', 'सीने में दर्द हो रहा है',
+]
+NOT_RED_FLAG_EXAMPLES = [
+    'this shirt fits well', 'a stroke of luck', 'food poisoning last week', 'breathing exercises help',
+]
+
+EMERGENCY_TEMPLATES = {
+    'en': "⚠️ Your symptoms may be serious. Please call 108 or go to the nearest hospital immediately. More guidance is on its way.",
+    'hi': "⚠️ आपके लक्षण गंभीर हो सकते हैं। कृपया तुरंत 108 पर कॉल करें या नज़दीकी अस्पताल जाएं। अधिक जानकारी जल्द भेजी जा रही है।",
+    'mr': "⚠️ तुमची लक्षणे गंभीर असू शकतात. कृपया लगेच 108 वर कॉल करा किंवा जवळच्या रुग्णालयात जा.",
+    'bn': "⚠️ আপনার উপসর্গ গুরুতর হতে পারে। অনুগ্রহ করে এখনই 108-এ কল করুন বা নিকটতম হাসপাতালে যান।",
+    'te': "⚠️ మీ లక్షణాలు తీవ్రమైనవి కావచ్చు. దయచేసి వెంటనే 108కి కాల్ చేయండి లేదా దగ్గరలోని ఆసుపత్రికి వెళ్లండి.",
+    'ta': "⚠️ உங்கள் அறிகுறிகள் தீவிரமாக இருக்கலாம். உடனடியாக 108-ஐ அழைக்கவும் அல்லது அருகிலுள்ள மருத்துவமனைக்குச் செல்லவும்.",
+    'gu': "⚠️ તમારા લક્ષણો ગંભીર હોઈ શકે છે. કૃપા કરીને તરત જ 108 પર કૉલ કરો અથવા નજીકની હોસ્પિટલમાં જાઓ.",
+    'kn': "⚠️ ನಿಮ್ಮ ಲಕ್ಷಣಗಳು ಗಂಭೀರವಾಗಿರಬಹುದು. ದಯವಿಟ್ಟು ತಕ್ಷಣ 108ಕ್ಕೆ ಕರೆ ಮಾಡಿ ಅಥವಾ ಹತ್ತಿರದ ಆಸ್ಪತ್ರೆಗೆ ಹೋಗಿ.",
+    'ml': "⚠️ നിങ്ങളുടെ ലക്ഷണങ്ങൾ ഗുരുതരമായിരിക്കാം. ഉടൻ 108-ൽ വിളിക്കുക അല്ലെങ്കിൽ അടുത്തുള്ള ആശുപത്രിയിൽ പോകുക.",
+    'pa': "⚠️ ਤੁਹਾਡੇ ਲੱਛਣ ਗੰਭੀਰ ਹੋ ਸਕਦੇ ਹਨ। ਕਿਰਪਾ ਕਰਕੇ ਤੁਰੰਤ 108 'ਤੇ ਕਾਲ ਕਰੋ ਜਾਂ ਨੇੜਲੇ ਹਸਪਤਾਲ ਜਾਓ।",
+    'or': "⚠️ ଆପଣଙ୍କ ଲକ୍ଷଣ ଗୁରୁତର ହୋଇପାରେ। ଦୟାକରି ତୁରନ୍ତ 108କୁ କଲ କରନ୍ତୁ କିମ୍ବା ନିକଟସ୍ଥ ହସ୍ପିଟାଲକୁ ଯାଆନ୍ତୁ।",
+    'ur': "⚠️ آپ کی علامات سنگین ہو سکتی ہیں۔ براہ کرم فوراً 108 پر کال کریں یا قریبی ہسپتال جائیں۔",
+}
+
+# Phone keyboards insert typographic apostrophes ("can’t breathe")
+_APOSTROPHES = str.maketrans({'\u2019': "'", '\u2018': "'", '\u02bc': "'"})
+# Endings a Latin-script phrase may carry; the stem alone decides the phrase
+_LATIN_SUFFIX = r'(?:s|es|ness|ing|ed)?'
+
+def _normalize(text):
+    return unicodedata.normalize('NFC', text or '').translate(_APOSTROPHES).lower()
+
+def _trie_pattern(phrases):
+    # Character trie rendered as nested groups, so the regex engine rejects a
+    # position after one or two characters instead of trying every phrase
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for ch in phrase:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+
+    def render(node):
+        alternatives = [
+            (r'\s+' if ch == ' ' else re.escape(ch)) + render(child)
+            for ch, child in sorted(node.items()) if ch != ''
+        ]
+        if not alternatives:
+            return ''
+        body = alternatives[0] if len(alternatives) == 1 else '(?:' + '|'.join(alternatives) + ')'
+        if '' in node:
+            return f'(?:{body})?' if len(alternatives) == 1 else body + '?'
+        return body
+
+    return render(trie)
+
+def _build_matcher(lexicon):
+    phrase_lang = {}
+    for lang, phrases in lexicon.items():
+        for phrase in phrases:
+            phrase_lang.setdefault(' '.join(_normalize(phrase).split()), lang.split('-')[0])
+    latin = [p for p in phrase_lang if p.isascii()]
+    native = [p for p in phrase_lang if not p.isascii()]
+    return _compile_phrases(latin, native), phrase_lang
+
+def _compile_phrases(latin, native):
+    # Group 1 is the Latin phrase without its suffix, group 2 the Indic phrase
+    return re.compile(rf'\b({_trie_pattern(latin)}){_LATIN_SUFFIX}\b|({_trie_pattern(native)})', re.IGNORECASE)
+
+def _phrase(match):
+    return ' '.join((match.group(1) or match.group(2)).split())
+
+_RED_FLAG_RE, _PHRASE_LANG = _build_matcher(RED_FLAGS)
+
+def find_red_flags(text):
+    """
+    Returns (phrase, language) for every red flag found in `text`, using a
+    single pass of one compiled trie regex over the whole lexicon.
+    """
+    found = []
+    for match in _RED_FLAG_RE.finditer(_normalize(text)):
+        phrase = _phrase(match)
+        found.append((phrase, _PHRASE_LANG.get(phrase, 'en')))
+    return found
+
+# === Symptom Terms ===
+# Surface forms -> canonical English term, used for per-patient symptom frequencies
+SYMPTOM_TERMS = {
+    'fever': ['fever', 'temperature', 'bukhar', 'बुखार', 'ताप', 'জ্বর', 'జ్వరం', 'காய்ச்சல்', 'તાવ', 'ಜ್ವರ', 'പനി', 'ਬੁਖਾਰ', 'ଜ୍ୱର', 'بخار'],
+    'cough': ['cough', 'coughing', 'khansi', 'खांसी', 'खाँसी', 'কাশি', 'దగ్గు', 'இருமல்', 'ખાંસી', 'ಕೆಮ್ಮು', 'ചുമ', 'ਖੰਘ', 'କାଶ', 'کھانسی'],
+    'headache': ['headache', 'sir dard', 'सिरदर्द', 'सिर दर्द', 'মাথাব্যথা', 'মাথা ব্যথা', 'తలనొప్పి', 'தலைவலி', 'માથાનો દુખાવો', 'ತಲೆನೋವು', 'തലവേദന', 'ਸਿਰ ਦਰਦ', 'ମୁଣ୍ଡବିନ୍ଧା', 'سر درد'],
+    'cold': ['cold', 'runny nose', 'jukam', 'जुकाम', 'ज़ुकाम', 'সর্দি', 'జలుబు', 'சளி', 'શરદી', 'ನೆಗಡಿ', 'ജലദോഷം', 'ਜ਼ੁਕਾਮ', 'ଥଣ୍ଡା', 'زکام'],
+    'sore throat': ['sore throat', 'throat pain', 'गले में खराश', 'गला खराब', 'গলা ব্যথা', 'గొంతు నొప్పి', 'தொண்டை வலி', 'ગળામાં દુખાવો', 'ಗಂಟಲು ನೋವು', 'തൊണ്ടവേദന', 'ਗਲੇ ਵਿੱਚ ਦਰਦ', 'گلے میں خراش'],
+    'vomiting': ['vomiting', 'vomit', 'ulti', 'उल्टी', 'उलटी', 'বমি', 'వాంతి', 'வாந்தி', 'ઉલટી', 'ವಾಂತಿ', 'ഛർദ്ദി', 'ਉਲਟੀ', 'ବାନ୍ତି', 'الٹی'],
+    'nausea': ['nausea', 'nauseous', 'जी मचल', 'বমি বমি ভাব', 'వికారం', 'குமட்டல்', 'ઉબકા', 'ವಾಕರಿಕೆ', 'ഓക്കാനം', 'ਜੀ ਕੱਚਾ', 'متلی'],
+    'diarrhea': ['diarrhea', 'diarrhoea', 'loose motion', 'loose motions', 'dast', 'दस्त', 'ডায়রিয়া', 'পাতলা পায়খানা', 'విరేచనాలు', 'வயிற்றுப்போக்கு', 'ઝાડા', 'ಅತಿಸಾರ', 'വയറിളക്കം', 'ਦਸਤ', 'ଝାଡ଼ା', 'اسہال'],
+    'stomach pain': ['stomach pain', 'stomach ache', 'abdominal pain', 'pet dard', 'पेट दर्द', 'पेट में दर्द', 'পেট ব্যথা', 'కడుపు నొప్పి', 'வயிற்று வலி', 'પેટમાં દુખાવો', 'ಹೊಟ್ಟೆ ನೋವು', 'വയറുവേദന', 'ਪੇਟ ਦਰਦ', 'ପେଟ ବିନ୍ଧା', 'پیٹ درد'],
+    'fatigue': ['fatigue', 'tired', 'weakness', 'thakan', 'कमजोरी', 'कमज़ोरी', 'थकान', 'ক্লান্তি', 'দুর্বলতা', 'అలసట', 'சோர்வு', 'થાક', 'ಆಯಾಸ', 'ക്ഷീണം', 'ਥਕਾਵਟ', 'କ୍ଲାନ୍ତି', 'تھکاوٹ'],
+    'dizziness': ['dizziness', 'dizzy', 'chakkar', 'चक्कर', 'মাথা ঘোরা', 'తల తిరగడం', 'தலைச்சுற்றல்', 'ચક્કર', 'ತಲೆತಿರುಗುವಿಕೆ', 'തലകറക്കം', 'ਚੱਕਰ', 'ମୁଣ୍ଡ ବୁଲାଇବା', 'چکر'],
+    'body ache': ['body ache', 'body pain', 'badan dard', 'बदन दर्द', 'शरीर में दर्द', 'গা ব্যথা', 'ఒళ్ళు నొప్పులు', 'உடல் வலி', 'શરીરમાં દુખાવો', 'ಮೈ ಕೈ ನೋವು', 'ശരീരവേദന', 'ਸਰੀਰ ਦਰਦ', 'جسم درد'],
+    'joint pain': ['joint pain', 'knee pain', 'जोड़ों में दर्द', 'घुटने में दर्द', 'গাঁটে ব্যথা', 'కీళ్ల నొప్పులు', 'மூட்டு வலி', 'સાંધાનો દુખાવો', 'ಕೀಲು ನೋವು', 'സന്ധിവേദന', 'ਜੋੜਾਂ ਦਾ ਦਰਦ', 'جوڑوں کا درد'],
+    'back pain': ['back pain', 'kamar dard', 'कमर दर्द', 'पीठ दर्द', 'পিঠে ব্যথা', 'నడుము నొప్పి', 'முதுகு வலி', 'કમરનો દુખાવો', 'ಬೆನ್ನು ನೋವು', 'നടുവേദന', 'ਕਮਰ ਦਰਦ', 'کمر درد'],
+    'rash': ['rash', 'itching', 'khujli', 'खुजली', 'दाने', 'চুলকানি', 'దద్దుర్లు', 'அரிப்பு', 'ખંજવાળ', 'ತುರಿಕೆ', 'ചൊറിച്ചിൽ', 'ਖਾਰਸ਼', 'خارش'],
+    'breathlessness': ['breathless', 'shortness of breath', 'सांस फूल', 'শ্বাসকষ্ট', 'ఆయాసం', 'மூச்சுத் திணறல்', 'શ્વાસ ચડ', 'ಉಸಿರಾಟದ ತೊಂದರೆ', 'ശ്വാസം മുട്ട', 'ਸਾਹ ਚੜ੍ਹ', 'سانس پھول'],
+    'chest pain': ['chest pain', 'seene me dard', 'सीने में दर्द', 'छाती में दर्द', 'বুকে ব্যথা', 'ఛాతీ నొప్పి', 'நெஞ்சு வலி', 'છાતીમાં દુખાવો', 'ಎದೆ ನೋವು', 'നെഞ്ചുവേദന', 'ਛਾਤੀ ਵਿੱਚ ਦਰਦ', 'سینے میں درد'],
+    'high sugar': ['high sugar', 'blood sugar', 'sugar badh', 'शुगर', 'মধুমেহ', 'షుగర్', 'சர்க்கரை', 'ડાયાબિટીસ', 'ಸಕ್ಕರೆ ಕಾಯಿಲೆ', 'പ്രമേഹം', 'ਸ਼ੂਗਰ', 'شوگر'],
+    'high bp': ['blood pressure', 'high bp', 'hypertension', 'बीपी', 'रक्तचाप', 'রক্তচাপ', 'రక్తపోటు', 'இரத்த அழுத்தம்', 'બ્લડ પ્રેશર', 'ರಕ್ತದೊತ್ತಡ', 'രക്തസമ്മർദ്ദം', 'ਬਲੱਡ ਪ੍ਰੈਸ਼ਰ', 'بلڈ پریشر'],
+}
+
+def _build_term_matcher(lexicon):
+    term_of = {}
+    for term, forms in lexicon.items():
+        for form in forms:
+            term_of.setdefault(' '.join(_normalize(form).split()), term)
+    latin = [f for f in term_of if f.isascii()]
+    native = [f for f in term_of if not f.isascii()]
+    return _compile_phrases(latin, native), term_of
+
+_SYMPTOM_RE, _TERM_OF = _build_term_matcher(SYMPTOM_TERMS)
+
+def extract_symptom_terms(text):
+    # Canonical symptom terms mentioned in `text`, deduplicated, in order of appearance
+    terms = (_TERM_OF.get(_phrase(m)) for m in _SYMPTOM_RE.finditer(_normalize(text)))
+    return list(dict.fromkeys(t for t in terms if t))
+
 def check_emergency(text):
-    red_flags = ['chest pain', 'breathless', 'faint', 'unconscious', 'seizure', 'vomiting blood']
-    return any(flag in text.lower() for flag in red_flags)
+    return _RED_FLAG_RE.search(_normalize(text)) is not None
+
+def emergency_template(language):
+    return EMERGENCY_TEMPLATES.get(language, EMERGENCY_TEMPLATES['en'])
+
+def emergency_language(flags, fallback='en'):
+    # The script of a matched native phrase names languages detect_language
+    # cannot (mr, kn, ml, pa, or, ur); English phrases defer to the fallback
+    for _, language in flags:
+        if language != 'en':
+            return language
+    return fallback
+
+def _check_lexicon():
+    missed = [text for text in RED_FLAG_EXAMPLES if not check_emergency(text)]
+    flagged = [text for text in NOT_RED_FLAG_EXAMPLES if check_emergency(text)]
+    if missed or flagged:
+        raise RuntimeError(f"Red-flag lexicon regression: missed {missed}, wrongly flagged {flagged}")
+
+_check_lexicon()
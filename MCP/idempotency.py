@@ -0,0 +1,99 @@
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from pymongo.errors import DuplicateKeyError
+from db import db
+
+PROCESSED_TTL_DAYS = int(os.getenv("PROCESSED_MESSAGES_TTL_DAYS", "7"))
+RECENT_IDS_MAX = int(os.getenv("RECENT_MESSAGE_IDS_MAX", "10000"))
+# A claim still 'processing' after this long belongs to a crashed worker and may be retaken
+CLAIM_STALE_SECONDS = int(os.getenv("MESSAGE_CLAIM_STALE_SECONDS", "300"))
+
+processed_messages = db['processed_messages']
+
+def ensure_indexes():
+    # _id holds the MessageSid (unique); the TTL index keeps the collection small
+    processed_messages.create_index('created_at', expireAfterSeconds=PROCESSED_TTL_DAYS * 86400,
+                                    name='created_at_ttl')
+
+# === Idempotency Guard ===
+class IdempotencyGuard:
+    """
+    Exactly-once gate for inbound Twilio messages keyed on MessageSid.
+
+    Retries that hit the same process are rejected from a bounded LRU of
+    recent IDs without a database call. Anything else is decided by
+    inserting the SID as an `_id` in processed_messages: only the first
+    insert succeeds, across all processes.
+
+    A claim starts as 'processing'. The caller marks it done with
+    `complete`, or gives it back with `release` when the turn fails so that
+    Twilio's retry is processed. A 'processing' claim older than
+    CLAIM_STALE_SECONDS (its worker crashed) can be taken again.
+
+    A retry that arrives while the claim is still 'processing' is recorded
+    on it; `complete` reports that, because Twilio has given up on the
+    original response and the reply must go out another way.
+    """
+
+    def __init__(self, collection=processed_messages, max_recent=RECENT_IDS_MAX, stale_after=CLAIM_STALE_SECONDS):
+        self.collection = collection
+        self.max_recent = max_recent
+        self.stale_after = stale_after
+        self._recent = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, sid):
+        self._recent[sid] = self._recent.get(sid, 'processing')
+        self._recent.move_to_end(sid)
+        if len(self._recent) > self.max_recent:
+            self._recent.popitem(last=False)
+
+    def claim(self, sid):
+        if not sid:
+            return True  # Not from Twilio (no SID to deduplicate on)
+        with self._lock:
+            if sid in self._recent:
+                self._recent.move_to_end(sid)
+                if self._recent[sid] == 'processing':
+                    self._recent[sid] = 'retried'
+                return False
+        now = datetime.utcnow()
+        try:
+            self.collection.insert_one({'_id': sid, 'status': 'processing', 'created_at': now})
+            claimed = True
+        except DuplicateKeyError:
+            # Take over a claim abandoned mid-turn by a crashed process
+            claimed = self.collection.update_one(
+                {'_id': sid, 'status': 'processing', 'created_at': {'$lt': now - timedelta(seconds=self.stale_after)}},
+                {'$set': {'created_at': now}}
+            ).modified_count == 1
+            if not claimed:
+                self.collection.update_one({'_id': sid, 'status': 'processing'}, {'$set': {'retried': True}})
+        with self._lock:
+            self._remember(sid)
+        return claimed
+
+    def complete(self, sid):
+        """
+        Marks the claim done. Returns True if a retry of the message arrived
+        while it was being processed.
+        """
+        if not sid:
+            return False
+        with self._lock:
+            retried = self._recent.get(sid) == 'retried'
+            if sid in self._recent:
+                self._recent[sid] = 'done'
+        doc = self.collection.find_one_and_update({'_id': sid}, {'$set': {'status': 'done'}},
+                                                  projection={'retried': 1})
+        return retried or bool(doc and doc.get('retried'))
+
+    def release(self, sid):
+        # The turn failed: forget the SID so Twilio's retry is handled instead of dropped
+        if not sid:
+            return
+        with self._lock:
+            self._recent.pop(sid, None)
+        self.collection.delete_one({'_id': sid, 'status': 'processing'})
@@ -0,0 +1,71 @@
+import os
+import time
+import queue
+import threading
+from collections import deque
+from assistant import generate_reply
+from outbound_queue import queue_whatsapp_message
+
+INBOUND_WORKERS = int(os.getenv("INBOUND_WORKERS", "4"))
+INBOUND_MAX_QUEUE = int(os.getenv("INBOUND_MAX_QUEUE", "1000"))
+
+# === Asynchronous WhatsApp Reply Workers ===
+class InboundWorkerPool:
+    """
+    Generates WhatsApp replies off the webhook path. The webhook enqueues
+    and acknowledges at once; workers run the assistant turn and hand the
+    reply to the outbound queue.
+    """
+
+    def __init__(self, workers=INBOUND_WORKERS, max_queue=INBOUND_MAX_QUEUE, guard=None):
+        self._queue = queue.Queue(maxsize=max_queue)
+        self.guard = guard  # IdempotencyGuard whose claims are completed or released per message
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=1000)  # seconds from enqueue to reply queued for delivery
+        self.processed = 0
+        self.failed = 0
+        self._threads = [
+            threading.Thread(target=self._run, name=f"inbound-worker-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def enqueue(self, phone, message, sid=None):
+        # Raises queue.Full when saturated so the webhook can fall back to inline handling
+        self._queue.put_nowait((phone, message, sid, time.monotonic()))
+
+    def _run(self):
+        while True:
+            phone, message, sid, enqueued_at = self._queue.get()
+            try:
+                reply, _ = generate_reply(phone, message, use_history=True)  # phone is Twilio's From
+                queue_whatsapp_message(phone, reply, block=True)
+                if self.guard:
+                    self.guard.complete(sid)
+                with self._lock:
+                    self.processed += 1
+                    self._latencies.append(time.monotonic() - enqueued_at)
+            except Exception as e:
+                print(f"❌ Failed to reply to {phone}: {e}")
+                if self.guard:
+                    self.guard.release(sid)
+                with self._lock:
+                    self.failed += 1
+            finally:
+                self._queue.task_done()
+
+    def stats(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            processed, failed = self.processed, self.failed
+        def pct(p):
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 3) if latencies else None
+        return {
+            'queue_depth': self._queue.qsize(),
+            'workers': len(self._threads),
+            'processed': processed,
+            'failed': failed,
+            'latency_p50_s': pct(0.5),
+            'latency_p95_s': pct(0.95),
+        }
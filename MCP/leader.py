@@ -0,0 +1,80 @@
+import os
+import uuid
+import socket
+import threading
+import functools
+from datetime import datetime, timedelta
+from pymongo.errors import DuplicateKeyError
+from db import db
+
+LEASE_TTL_SECONDS = int(os.getenv("SCHEDULER_LEASE_TTL_SECONDS", "60"))
+
+# Unique per process, so two workers on one host never share a lease
+OWNER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+leases = db['scheduler_leases']
+
+def ensure_indexes():
+    # Housekeeping only: correctness comes from comparing expires_at, not from TTL deletion
+    leases.create_index('expires_at', expireAfterSeconds=0, name='expires_at_ttl')
+
+# === Mongo-Backed Job Lease ===
+class JobLease:
+    """
+    Time-limited lease on a named job stored as one document in
+    scheduler_leases. A process can take it only when it is free, expired,
+    or already its own. If the holder dies, the lease lapses after `ttl`
+    seconds and the next process to try takes over.
+    """
+
+    def __init__(self, name, ttl=LEASE_TTL_SECONDS, owner=OWNER_ID):
+        self.name = name
+        self.ttl = ttl
+        self.owner = owner
+
+    def acquire(self):
+        now = datetime.utcnow()
+        try:
+            leases.update_one(
+                {'_id': self.name, '$or': [{'expires_at': {'$lt': now}}, {'owner': self.owner}]},
+                {'$set': {'owner': self.owner, 'expires_at': now + timedelta(seconds=self.ttl), 'renewed_at': now}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            return False  # Held by another live process
+
+    renew = acquire
+
+    def release(self):
+        leases.update_one({'_id': self.name, 'owner': self.owner}, {'$set': {'expires_at': datetime.utcnow()}})
+
+def run_exclusively(job_name, ttl=LEASE_TTL_SECONDS):
+    """
+    Decorator for scheduled jobs: only the process holding the job's lease
+    runs it. The lease is renewed every ttl/3 while the job is running.
+    """
+    def decorator(job):
+        @functools.wraps(job)
+        def wrapper(*args, **kwargs):
+            lease = JobLease(job_name, ttl)
+            if not lease.acquire():
+                return None
+            stop = threading.Event()
+
+            def heartbeat():
+                while not stop.wait(ttl / 3):
+                    if not lease.renew():
+                        print(f"⚠️ Lost lease on {job_name}; another process may take over")
+                        return
+
+            thread = threading.Thread(target=heartbeat, name=f"lease-{job_name}", daemon=True)
+            thread.start()
+            try:
+                return job(*args, **kwargs)
+            finally:
+                stop.set()
+                thread.join()
+                lease.release()
+        return wrapper
+    return decorator
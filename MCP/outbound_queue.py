@@ -0,0 +1,163 @@
+import os
+import time
+import heapq
+import random
+import itertools
+import threading
+from datetime import datetime
+import requests
+from twilio.base.exceptions import TwilioRestException
+from db import db
+from rate_limit import TokenBucket
+from twilio_client import send_whatsapp_message
+
+OUTBOUND_WORKERS = int(os.getenv("OUTBOUND_WORKERS", "4"))
+OUTBOUND_MAX_QUEUE = int(os.getenv("OUTBOUND_MAX_QUEUE", "50000"))
+OUTBOUND_MAX_ATTEMPTS = int(os.getenv("OUTBOUND_MAX_ATTEMPTS", "5"))
+TWILIO_MESSAGES_PER_SECOND = float(os.getenv("TWILIO_MESSAGES_PER_SECOND", "10"))
+# Every app process (on every host) sends from the same Twilio number, so each gets an equal share
+OUTBOUND_PROCESSES = max(1, int(os.getenv("OUTBOUND_PROCESSES", os.getenv("WEB_CONCURRENCY", "1"))))
+# Check-ins claimed in Mongo but not yet sent live only in memory; keep that window small
+CHECKIN_MAX_IN_FLIGHT = int(os.getenv("CHECKIN_MAX_IN_FLIGHT", "100"))
+
+# Lanes, served strictly in this order
+PRIORITY_EMERGENCY = 0
+PRIORITY_REPLY = 1
+PRIORITY_CHECKIN = 2
+PRIORITIES = (PRIORITY_EMERGENCY, PRIORITY_REPLY, PRIORITY_CHECKIN)
+
+dead_letters = db['outbound_dead_letters']
+
+class QueueFull(Exception):
+    pass
+
+def is_transient(error):
+    if isinstance(error, TwilioRestException):
+        return error.status == 429 or error.status >= 500
+    return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+def backoff_delay(attempt, base=1.0, cap=60.0):
+    # Exponential backoff with full jitter
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+# === Outbound WhatsApp Queue ===
+class OutboundQueue:
+    """
+    Delivers WhatsApp messages from a worker pool, paced by a token bucket
+    sized to this process's share of the Twilio sender limit. Transient failures (429, 5xx, network)
+    are retried with jittered exponential backoff. Messages that fail
+    permanently, or run out of attempts, go to outbound_dead_letters.
+
+    Pending messages sit in one heap per priority lane, ordered by due time,
+    so retries wait without holding a worker. Workers always send the most
+    urgent due message: emergency warnings, then chat replies, then
+    scheduled check-ins. The check-in lane has its own small capacity, so a
+    large fan-out can never crowd out or delay interactive traffic.
+    """
+
+    def __init__(self, send=send_whatsapp_message, workers=OUTBOUND_WORKERS, rate=TWILIO_MESSAGES_PER_SECOND,
+                 max_attempts=OUTBOUND_MAX_ATTEMPTS, max_queue=OUTBOUND_MAX_QUEUE,
+                 max_checkins=CHECKIN_MAX_IN_FLIGHT, processes=OUTBOUND_PROCESSES):
+        self.send = send
+        self.bucket = TokenBucket(rate / processes)
+        self.max_attempts = max_attempts
+        self.capacity = {PRIORITY_EMERGENCY: max_queue, PRIORITY_REPLY: max_queue, PRIORITY_CHECKIN: max_checkins}
+        self._lanes = {priority: [] for priority in PRIORITIES}  # priority -> heap of (due, seq, message)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self.metrics = {'enqueued': 0, 'sent': 0, 'retried': 0, 'dead_lettered': 0, 'rejected': 0}
+        self._send_seconds = 0.0
+        self._threads = [
+            threading.Thread(target=self._run, name=f"outbound-worker-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def enqueue(self, to, body, block=False, priority=PRIORITY_REPLY):
+        message = {'to': to, 'body': body, 'attempts': 0, 'priority': priority, 'enqueued_at': time.monotonic()}
+        lane, capacity = self._lanes[priority], self.capacity[priority]
+        with self._cond:
+            while len(lane) >= capacity:
+                if not block:
+                    self.metrics['rejected'] += 1
+                    raise QueueFull(f"Outbound queue is full ({capacity} messages)")
+                self._cond.wait()
+            self._push(time.monotonic(), message)
+            self.metrics['enqueued'] += 1
+
+    def _push(self, due, message):
+        heapq.heappush(self._lanes[message['priority']], (due, next(self._seq), message))
+        self._cond.notify_all()
+
+    def _next(self):
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                next_due = None
+                for priority in PRIORITIES:
+                    lane = self._lanes[priority]
+                    if not lane:
+                        continue
+                    if lane[0][0] <= now:
+                        message = heapq.heappop(lane)[2]
+                        self._cond.notify_all()  # Wake producers blocked on a full lane
+                        return message
+                    next_due = lane[0][0] if next_due is None else min(next_due, lane[0][0])
+                self._cond.wait(None if next_due is None else next_due - now)
+
+    def _run(self):
+        while True:
+            # Take the send token first, so the message chosen is the most urgent one at send time
+            self.bucket.acquire()
+            message = self._next()
+            started = time.monotonic()
+            try:
+                self.send(message['to'], message['body'])
+            except Exception as e:
+                self._failed(message, e)
+                continue
+            with self._cond:
+                self.metrics['sent'] += 1
+                self._send_seconds += time.monotonic() - started
+
+    def _failed(self, message, error):
+        message['attempts'] += 1
+        if is_transient(error) and message['attempts'] < self.max_attempts:
+            with self._cond:
+                self.metrics['retried'] += 1
+                self._push(time.monotonic() + backoff_delay(message['attempts']), message)
+            return
+        print(f"❌ Dead-lettering WhatsApp message to {message['to']}: {error}")
+        with self._cond:
+            self.metrics['dead_lettered'] += 1
+        try:
+            dead_letters.insert_one({
+                'to': message['to'],
+                'body': message['body'],
+                'attempts': message['attempts'],
+                'error': str(error),
+                'failed_at': datetime.utcnow(),
+            })
+        except Exception as e:
+            print(f"❌ Could not record dead letter: {e}")
+
+    def stats(self):
+        with self._cond:
+            sent = self.metrics['sent']
+            return {
+                **self.metrics,
+                'queue_depth': sum(len(lane) for lane in self._lanes.values()),
+                'lane_depth': {'emergency': len(self._lanes[PRIORITY_EMERGENCY]),
+                               'reply': len(self._lanes[PRIORITY_REPLY]),
+                               'checkin': len(self._lanes[PRIORITY_CHECKIN])},
+                'workers': len(self._threads),
+                'rate_per_second': self.bucket.rate,
+                'avg_send_ms': round(1000 * self._send_seconds / sent, 1) if sent else None,
+            }
+
+outbound = OutboundQueue()
+
+def queue_whatsapp_message(to, body, block=False, priority=PRIORITY_REPLY):
+    # Returns immediately; delivery, pacing and retries happen on the outbound workers
+    outbound.enqueue(to, body, block=block, priority=priority)
@@ -0,0 +1,144 @@
+import time
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pymongo import ASCENDING, UpdateOne
+from pymongo.errors import BulkWriteError, CollectionInvalid, PyMongoError
+from db import db, BufferedWriter, on_symptom_log
+from health_logic import check_emergency, extract_symptom_terms
+
+symptom_events = db['symptom_events']
+daily_rollups = db['symptom_rollups_daily']
+weekly_rollups = db['symptom_rollups_weekly']
+
+PERIODS = {'day': daily_rollups, 'week': weekly_rollups}
+ROLLUP_RETRY_SECONDS = 5
+MAX_RETRY_OPS = 100000
+
+def ensure_collections():
+    try:
+        # Time-series collection: events for one patient are bucketed together by hour
+        db.create_collection('symptom_events',
+                             timeseries={'timeField': 'date', 'metaField': 'phone', 'granularity': 'hours'})
+    except CollectionInvalid:
+        pass  # Already exists
+    for rollups in PERIODS.values():
+        rollups.create_index([('phone', ASCENDING), ('start', ASCENDING)], name='phone_start')
+    print("📈 Symptom event and rollup collections ready")
+
+def period_start(date, period):
+    day = datetime(date.year, date.month, date.day)
+    return day - timedelta(days=day.weekday()) if period == 'week' else day
+
+# === Incremental Rollups ===
+def apply_rollups(events):
+    """
+    Folds a flushed batch of events into daily and weekly rollup documents.
+    Increments are merged per (patient, period) in memory first, so a burst
+    from one patient costs one upsert per period rather than one per message.
+    """
+    for period, rollups in PERIODS.items():
+        merged = defaultdict(lambda: defaultdict(int))
+        last_at = {}
+        for event in events:
+            key = (event['phone'], period_start(event['date'], period))
+            inc = merged[key]
+            inc['count'] += 1
+            inc['emergencies'] += int(event['emergency'])
+            for term in event['terms']:
+                inc[f'terms.{term}'] += 1
+            last_at[key] = max(last_at.get(key, event['date']), event['date'])
+
+        ops = _take_retries(period) + [
+            UpdateOne({'_id': f"{phone}|{start:%Y-%m-%d}"},
+                      {'$inc': dict(inc),
+                       '$max': {'last_at': last_at[(phone, start)]},
+                       '$setOnInsert': {'phone': phone, 'start': start, 'period': period}},
+                      upsert=True)
+            for (phone, start), inc in merged.items()
+        ]
+        _bulk_apply(period, ops)
+
+# $inc is not idempotent, so failed rollup ops are kept and re-applied rather than dropped
+_retry_ops = defaultdict(list)  # period -> UpdateOne ops still to apply
+_retry_lock = threading.Lock()
+
+def _take_retries(period):
+    with _retry_lock:
+        ops, _retry_ops[period] = _retry_ops[period], []
+    return ops
+
+def _bulk_apply(period, ops):
+    if not ops:
+        return
+    try:
+        PERIODS[period].bulk_write(ops, ordered=False)
+        return
+    except BulkWriteError as e:
+        failed = [ops[err['index']] for err in e.details.get('writeErrors', [])]
+    except PyMongoError as e:
+        # Connection-level failure: the outcome is unknown, so retry everything (at least once)
+        print(f"⚠️ {period} rollup write failed: {e}")
+        failed = ops
+    if failed:
+        with _retry_lock:
+            pending = _retry_ops[period]
+            pending.extend(failed[:max(0, MAX_RETRY_OPS - len(pending))])
+        print(f"⚠️ Re-queued {len(failed)} {period} rollup updates")
+
+def retry_rollups():
+    for period in PERIODS:
+        _bulk_apply(period, _take_retries(period))
+
+def _retry_loop():
+    # Failed ops are retried even when no new events arrive to trigger a flush
+    while True:
+        time.sleep(ROLLUP_RETRY_SECONDS)
+        if any(_retry_ops.values()):
+            retry_rollups()
+
+threading.Thread(target=_retry_loop, name="rollup-retry", daemon=True).start()
+
+event_writer = BufferedWriter(symptom_events, on_flush=apply_rollups, name="symptom-event-writer")
+
+_event_listeners = []
+
+def on_symptom_event(callback):
+    # callback(event) runs for every enriched symptom event (red flag + terms already extracted)
+    _event_listeners.append(callback)
+
+def record_event(doc):
+    event = {
+        'phone': doc['phone'],
+        'date': doc['date'],
+        'language': doc.get('language'),
+        'emergency': check_emergency(doc.get('symptom', '')),
+        'terms': extract_symptom_terms(doc.get('symptom', '')),
+    }
+    event_writer.write(event)
+    for callback in _event_listeners:
+        try:
+            callback(event)
+        except Exception as e:
+            print(f"⚠️ Symptom event listener failed: {e}")
+
+on_symptom_log(record_event)
+
+# === Reads ===
+def get_rollups(phone, period='day', days=30):
+    since = period_start(datetime.now() - timedelta(days=days), period)
+    cursor = (PERIODS[period]
+              .find({'phone': phone, 'start': {'$gte': since}}, {'_id': 0})
+              .sort('start', ASCENDING))
+    return list(cursor)
+
+def summarize(rollups):
+    terms = defaultdict(int)
+    for rollup in rollups:
+        for term, count in rollup.get('terms', {}).items():
+            terms[term] += count
+    return {
+        'messages': sum(r.get('count', 0) for r in rollups),
+        'emergencies': sum(r.get('emergencies', 0) for r in rollups),
+        'top_terms': sorted(terms.items(), key=lambda item: item[1], reverse=True)[:5],
+    }
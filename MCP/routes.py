@@ -1,13 +1,45 @@
-from flask import request, jsonify
+import os
+import time
+import queue
+from flask import request, jsonify, Response, stream_with_context
 from datetime import datetime
-from mistral_client import call_health_assistant
+from bson import ObjectId
+from assistant import generate_reply
+from auth import require_admin_token
+from db import valid_timezone
+from health_logic import find_red_flags, emergency_template, emergency_language
 from translate_client import detect_language
-from db import save_symptom_log
-from twilio_client import send_whatsapp_message
-from health_logic import check_emergency
+from rollups import PERIODS, get_rollups, summarize
+from alerts import recent_alerts
+from export import parse_fields, iter_patient_logs, ndjson_lines, csv_lines, chunked
+from idempotency import IdempotencyGuard
+from outbound_queue import outbound, queue_whatsapp_message, QueueFull, PRIORITY_EMERGENCY, PRIORITY_REPLY
 from twilio.twiml.messaging_response import MessagingResponse
 
+# Acknowledge Twilio immediately and deliver the reply from a worker pool
+WHATSAPP_ASYNC_REPLIES = os.getenv("WHATSAPP_ASYNC_REPLIES", "false").lower() in ("1", "true", "yes")
+# Twilio drops a webhook response after 15 s; inline replies slower than this go out via the REST API
+TWILIO_REPLY_DEADLINE = float(os.getenv("TWILIO_REPLY_DEADLINE_SECONDS", "12"))
+
+def notify(phone, body, priority=PRIORITY_REPLY):
+    # Best-effort WhatsApp copy: the turn has already run and been logged, so a full queue must not 500
+    try:
+        queue_whatsapp_message(phone, body, priority=priority)
+        return True
+    except QueueFull:
+        print(f"⚠️ Outbound queue full, WhatsApp message to {phone} not queued")
+        return False
+
+def warn(phone):
+    return lambda warning: notify(phone, warning, PRIORITY_EMERGENCY)
+
 def register_routes(app):
+    message_guard = IdempotencyGuard()
+    inbound_workers = None
+    if WHATSAPP_ASYNC_REPLIES:
+        from inbound_worker import InboundWorkerPool
+        inbound_workers = InboundWorkerPool(guard=message_guard)
+
     @app.route('/api/health-chat', methods=['POST'])
     def health_chat():
         """
@@ -16,32 +48,18 @@ def register_routes(app):
         data = request.json
         message = data.get('message', '').strip()
         phone = data.get('phone', '').strip()
-        language = detect_language(message)
-
-        system_prompt = {
-            "role": "system",
-            "content": f"""You are CareMate, a multilingual AI health assistant.
-
-- Respond only in {language.upper()}
-- Be empathetic and culturally relevant
-- Suggest safe home remedies
-- Advise when to see a doctor
-- Do NOT prescribe medicines
-- End every response with: "Would you like me to continue checking your symptoms or help connect you to a doctor?" """
-        }
-
-        messages = [system_prompt, {"role": "user", "content": message}]
-        reply = call_health_assistant(messages)
-
-        if check_emergency(message):
-            reply += "\n\n⚠️ Your symptoms may be serious. Please visit a doctor immediately."
+        tz_name = data.get('timezone')  # Optional IANA name, e.g. "Asia/Kolkata"
+        if tz_name and not valid_timezone(tz_name):
+            return jsonify({'error': 'Invalid timezone', 'success': False}), 400
 
-        send_whatsapp_message(phone, reply)
-        save_symptom_log(phone, message, language, reply)
+        # phone is unauthenticated here, so its conversation history is never loaded into the prompt
+        reply, language = generate_reply(phone, message, timezone=tz_name, on_emergency=warn(phone))
+        delivered = notify(phone, reply)
 
         return jsonify({
             'response': reply,
             'language': language,
+            'whatsapp_queued': delivered,
             'success': True,
             'timestamp': datetime.now().isoformat()
         })
@@ -53,34 +71,134 @@ def register_routes(app):
         """
         incoming_msg = request.form.get('Body')
         from_number = request.form.get('From').replace('whatsapp:', '')
+        message_sid = request.form.get('MessageSid')
 
-        print(f"📲 Incoming WhatsApp message from {from_number}: {incoming_msg}")
+        resp = MessagingResponse()
+        if not message_guard.claim(message_sid):
+            # Still in flight: the first turn sees the retry and sends its reply via REST
+            print(f"🔁 Ignoring Twilio retry of {message_sid}")
+            return str(resp)
 
-        language = detect_language(incoming_msg)
+        print(f"📲 Incoming WhatsApp message from {from_number}: {incoming_msg}")
 
-        system_prompt = {
-            "role": "system",
-            "content": f"""You are CareMate, a multilingual AI health assistant.
+        if inbound_workers is not None:
+            try:
+                inbound_workers.enqueue(from_number, incoming_msg, message_sid)
+                flags = find_red_flags(incoming_msg)
+                if flags:
+                    # Red flag: the ack itself carries the warning; the LLM detail follows
+                    language = emergency_language(flags, detect_language(incoming_msg))
+                    resp.message(emergency_template(language))
+                return str(resp)  # Otherwise empty TwiML: the reply follows via the REST API
+            except queue.Full:
+                print("⚠️ Inbound queue full, replying inline")
+
+        started = time.monotonic()
+        try:
+            reply, _ = generate_reply(from_number, incoming_msg,
+                                      on_emergency=warn(from_number), use_history=True)
+        except Exception:
+            message_guard.release(message_sid)  # Let Twilio's retry run the turn again
+            raise
+        retried = message_guard.complete(message_sid)
+
+        if retried or time.monotonic() - started > TWILIO_REPLY_DEADLINE:
+            # Twilio has already given up on this response, so TwiML would never arrive
+            notify(from_number, reply)
+            return str(resp)
 
-- Respond only in {language.upper()}
-- Be empathetic and culturally relevant
-- Suggest safe home remedies
-- Advise when to see a doctor
-- Do NOT prescribe medicines
-- End every response with: "Would you like me to continue checking your symptoms or help connect you to a doctor?" """
-        }
+        # Create WhatsApp reply using Twilio MessagingResponse
+        resp.message(reply)
 
-        messages = [system_prompt, {"role": "user", "content": incoming_msg}]
-        reply = call_health_assistant(messages)
+        return str(resp)
 
-        if check_emergency(incoming_msg):
-            reply += "\n\n⚠️ Your symptoms may be serious. Please visit a doctor immediately."
+    @app.route('/api/whatsapp-inbound/stats', methods=['GET'])
+    def whatsapp_inbound_stats():
+        """
+        Queue depth and reply latency for asynchronous webhook mode
+        """
+        if inbound_workers is None:
+            return jsonify({'async_replies': False})
+        return jsonify({'async_replies': True, **inbound_workers.stats()})
 
-        save_symptom_log(from_number, incoming_msg, language, reply)
+    @app.route('/api/outbound/stats', methods=['GET'])
+    def outbound_stats():
+        """
+        Outbound WhatsApp queue depth and delivery metrics
+        """
+        return jsonify(outbound.stats())
 
-        # Create WhatsApp reply using Twilio MessagingResponse
-        resp = MessagingResponse()
-        resp.message(reply)
+    @app.route('/api/alerts', methods=['GET'])
+    @require_admin_token
+    def patient_alert_feed():
+        """
+        Most recent worsening-symptom alerts (?phone=...&limit=50)
+        """
+        try:
+            limit = min(max(int(request.args.get('limit', 50)), 1), 500)
+        except ValueError:
+            return jsonify({'error': 'limit must be an integer', 'success': False}), 400
+        alerts = recent_alerts(request.args.get('phone'), limit)
+        for alert in alerts:
+            alert['created_at'] = alert['created_at'].isoformat()
+        return jsonify({'alerts': alerts, 'success': True})
+
+    @app.route('/api/patients/<phone>/rollups', methods=['GET'])
+    @require_admin_token
+    def patient_rollups(phone):
+        """
+        Daily or weekly symptom rollups for dashboards (?period=day|week&days=30)
+        """
+        period = request.args.get('period', 'day')
+        if period not in PERIODS:
+            return jsonify({'error': 'period must be day or week', 'success': False}), 400
+        try:
+            days = min(max(int(request.args.get('days', 30)), 1), 366)
+        except ValueError:
+            return jsonify({'error': 'days must be an integer', 'success': False}), 400
+
+        rollups = get_rollups(phone, period, days)
+        for rollup in rollups:
+            rollup['start'] = rollup['start'].date().isoformat()
+            rollup['last_at'] = rollup['last_at'].isoformat()
 
-        return str(resp)
+        return jsonify({
+            'phone': phone,
+            'period': period,
+            'rollups': rollups,
+            'summary': summarize(rollups),
+            'success': True
+        })
 
+    @app.route('/api/patients/<phone>/logs/export', methods=['GET'])
+    @require_admin_token
+    def export_patient_logs(phone):
+        """
+        Streams a patient's symptom log history as NDJSON or CSV
+        (?format=ndjson|csv&fields=date,symptom&after=<iso date>&after_id=<id>&limit=N&gzip=1)
+        """
+        fmt = request.args.get('format', 'ndjson')
+        if fmt not in ('ndjson', 'csv'):
+            return jsonify({'error': 'format must be ndjson or csv', 'success': False}), 400
+        try:
+            after = datetime.fromisoformat(request.args['after']) if 'after' in request.args else None
+            limit = int(request.args.get('limit', 0))
+        except ValueError:
+            return jsonify({'error': 'Invalid after or limit', 'success': False}), 400
+        after_id = request.args.get('after_id')
+        # Checked here: the generator below runs after the 200 status has been sent
+        if after_id is not None and (after is None or not ObjectId.is_valid(after_id)):
+            return jsonify({'error': 'after_id must be a valid id and requires after', 'success': False}), 400
+        fields = parse_fields(request.args.get('fields'))
+        compress = request.args.get('gzip', '0').lower() in ('1', 'true', 'yes')
+
+        rows = iter_patient_logs(phone, fields, after=after, after_id=after_id, limit=limit)
+        lines = ndjson_lines(rows) if fmt == 'ndjson' else csv_lines(rows, fields)
+
+        headers = {'Content-Disposition': f'attachment; filename="{phone}_logs.{fmt}{".gz" if compress else ""}"'}
+        # A .gz download, not a transfer encoding: clients must save the compressed bytes as-is
+        if compress:
+            mimetype = 'application/gzip'
+        else:
+            mimetype = 'application/x-ndjson' if fmt == 'ndjson' else 'text/csv'
+        return Response(stream_with_context(chunked(lines, compress)), mimetype=mimetype, headers=headers)
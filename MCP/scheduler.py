@@ -1,7 +1,96 @@
-from db import db
-from twilio_client import send_whatsapp_message
+import os
+import zlib
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+from db import patients, backfill_patients, timezone_for_phone, UNSCHEDULED
+from outbound_queue import queue_whatsapp_message, PRIORITY_CHECKIN
+
+CHECKIN_MESSAGE = "🩺 Hello! This is your daily health check-in. Reply with any symptoms you’re feeling today."
+CHECKIN_HOUR = int(os.getenv("CHECKIN_HOUR", "9"))
+CHECKIN_WINDOW_MINUTES = int(os.getenv("CHECKIN_WINDOW_MINUTES", "120"))
+CHECKIN_DEFAULT_TZ = os.getenv("CHECKIN_DEFAULT_TZ", "Asia/Kolkata")
+CHECKIN_POLL_MINUTES = int(os.getenv("CHECKIN_POLL_MINUTES", "5"))
+CHECKIN_BATCH_SIZE = int(os.getenv("CHECKIN_BATCH_SIZE", "500"))
+
+# === Per-Patient Check-in Slots ===
+def _zone(name):
+    try:
+        return ZoneInfo(name or CHECKIN_DEFAULT_TZ)
+    except Exception:
+        return ZoneInfo(CHECKIN_DEFAULT_TZ)
+
+def checkin_slot(phone, tz_name, local_date):
+    """
+    UTC time of a patient's check-in on `local_date`: CHECKIN_HOUR in their
+    timezone plus a stable per-phone offset inside the send window, so the
+    daily burst is spread evenly instead of all landing at 9:00.
+    """
+    offset = zlib.crc32(phone.encode()) % max(1, CHECKIN_WINDOW_MINUTES * 60)
+    local = datetime(local_date.year, local_date.month, local_date.day, CHECKIN_HOUR, tzinfo=_zone(tz_name))
+    return (local + timedelta(seconds=offset)).astimezone(timezone.utc).replace(tzinfo=None)
+
+def next_checkin(patient, now, sent):
+    # After a send, the next slot is tomorrow's (local); new patients get today's if it is still ahead
+    # Patients created before timezones were recorded fall back to their calling code
+    tz_name = patient.get('timezone') or timezone_for_phone(patient['phone'])
+    local_today = now.replace(tzinfo=timezone.utc).astimezone(_zone(tz_name)).date()
+    if not sent:
+        slot = checkin_slot(patient['phone'], tz_name, local_today)
+        if slot > now:
+            return slot
+    return checkin_slot(patient['phone'], tz_name, local_today + timedelta(days=1))
+
+# === Fan-out ===
+def _claim(patient, now):
+    """
+    Moves a due patient's next_checkin_at forward before sending. The update
+    only matches while the slot is unchanged, so the schedule itself is the
+    checkpoint: a crashed or concurrent run can never claim the same slot
+    twice.
+    """
+    sent = patient['next_checkin_at'] != UNSCHEDULED
+    result = patients.update_one(
+        {'_id': patient['_id'], 'next_checkin_at': patient['next_checkin_at']},
+        {'$set': {'next_checkin_at': next_checkin(patient, now, sent),
+                  **({'last_checkin_at': now} if sent else {})}}
+    )
+    return sent and result.modified_count == 1
 
 def send_daily_checkin():
-    users = db['symptom_logs'].distinct('phone')
-    for user in users:
-        send_whatsapp_message(user, "🩺 Hello! This is your daily health check-in. Reply with any symptoms you’re feeling today.")
+    now = datetime.utcnow()
+    projection = {'phone': 1, 'timezone': 1, 'next_checkin_at': 1}
+    claimed = 0
+    last = None
+
+    while True:
+        query = {'next_checkin_at': {'$lte': now}}
+        if last is not None:
+            # Keyset pagination on the (next_checkin_at, _id) index
+            query['$or'] = [{'next_checkin_at': {'$gt': last[0]}},
+                            {'next_checkin_at': last[0], '_id': {'$gt': last[1]}}]
+        batch = list(patients.find(query, projection)
+                     .sort([('next_checkin_at', 1), ('_id', 1)])
+                     .limit(CHECKIN_BATCH_SIZE))
+        if not batch:
+            break
+        last = (batch[-1]['next_checkin_at'], batch[-1]['_id'])
+
+        for patient in batch:
+            if not _claim(patient, now):
+                continue
+            claimed += 1
+            # Blocks while the small check-in lane is full: the scan is paced to Twilio throughput
+            # and at most CHECKIN_MAX_IN_FLIGHT claimed check-ins are ever held only in memory
+            queue_whatsapp_message(patient['phone'], CHECKIN_MESSAGE, block=True, priority=PRIORITY_CHECKIN)
+
+        if len(batch) < CHECKIN_BATCH_SIZE:
+            break
+
+    if claimed:
+        print(f"🩺 Daily check-in: {claimed} patients due this run")
+    return claimed
+
+def init_checkins():
+    if patients.estimated_document_count() == 0:
+        backfill_patients()
+        print("👥 Backfilled patients collection from symptom_logs")
@@ -0,0 +1,75 @@
+import os
+import time
+import random
+import argparse
+import tempfile
+from leaderboard import Leaderboard
+from points_store import PointsStore
+
+TASK_POINTS = [10, 15, 20, 25]
+
+def _timed(label, n, fn):
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<22}: {n / elapsed:>12,.0f} ops/s ({1e6 * elapsed / n:.2f} µs/op)")
+
+def bench_leaderboard(args, rng):
+    players = [f"player{i:07d}" for i in range(args.players)]
+    board = Leaderboard(seed=args.seed)
+
+    def load():
+        for player_id in players:
+            board.set(player_id, rng.randrange(0, 5000))
+
+    def updates():
+        for _ in range(args.updates):
+            player_id = rng.choice(players)
+            board.set(player_id, board.points[player_id] + rng.choice(TASK_POINTS))
+
+    def ranks():
+        for _ in range(args.queries):
+            board.rank(rng.choice(players))
+
+    def top_pages():
+        for _ in range(args.queries):
+            board.top(10, rng.randrange(0, 1000))
+
+    print(f"\n--- Skip-list leaderboard ({args.players:,} players) ---")
+    _timed("Initial load", args.players, load)
+    _timed("Score update", args.updates, updates)
+    _timed("Rank lookup", args.queries, ranks)
+    _timed("Top-10 page", args.queries, top_pages)
+
+    # Baseline: what a sort-on-read leaderboard costs for a single rank query
+    started = time.perf_counter()
+    ordered = sorted(board.points.items(), key=lambda item: (-item[1], item[0]))
+    print(f"{'Sort-on-read baseline':<22}: {1e3 * (time.perf_counter() - started):.0f} ms per query")
+
+    top = board.top(3)
+    assert [(-e['points'], e['player_id']) for e in top] == [(-p, i) for i, p in ordered[:3]]
+    return board
+
+def bench_store(args, rng):
+    path = os.path.join(tempfile.mkdtemp(), "bench_points.db")
+    store = PointsStore(path)
+    n = min(args.store_writes, args.players)
+    _timed("SQLite add_points", n, lambda: [
+        store.add_points(f"player{rng.randrange(args.players):07d}", rng.choice(TASK_POINTS)) for _ in range(n)])
+    store.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the game leaderboard and points store.")
+    parser.add_argument('--players', type=int, default=1_000_000)
+    parser.add_argument('--updates', type=int, default=200_000)
+    parser.add_argument('--queries', type=int, default=100_000)
+    parser.add_argument('--store-writes', type=int, default=20_000)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    bench_leaderboard(args, rng)
+    bench_store(args, rng)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import os
+import threading
+from flask import Flask, request, jsonify
+from flask_cors import CORS
+from leaderboard import Leaderboard
+from points_store import PointsStore
+from task_bank import get_task_bank
+
+GAME_PORT = int(os.getenv("GAME_PORT", "5003"))
+MAX_TASK_POINTS = int(os.getenv("GAME_MAX_TASK_POINTS", "50"))
+
+app = Flask(__name__)
+CORS(app)
+
+# Points persist in SQLite; the ranking is an in-memory skip list rebuilt from it at start-up
+store = PointsStore()
+leaderboard = Leaderboard()
+leaderboard_lock = threading.Lock()
+for player_id, points in store.all_points():
+    leaderboard.set(player_id, points)
+print(f"🏆 Leaderboard loaded with {len(leaderboard)} players")
+
+def _with_names(entries):
+    names = store.names([entry['player_id'] for entry in entries])
+    for entry in entries:
+        entry['name'] = names.get(entry['player_id'])
+    return entries
+
+@app.route('/api/game/tasks', methods=['POST'])
+def game_tasks():
+    """Personalized tasks for a profile (age, weight, height, healthConditions, fitnessGoal)"""
+    data = request.json or {}
+    try:
+        user_data = {
+            'age': int(data['age']),
+            'weight': float(data['weight']),
+            'height': float(data['height']),
+            'health_conditions': str(data.get('healthConditions', '')).lower(),
+            'goal': str(data.get('fitnessGoal', '')).lower(),
+        }
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'error': 'age, weight and height are required', 'success': False}), 400
+    return jsonify({'tasks': get_task_bank().tasks_for(user_data), 'success': True})
+
+@app.route('/api/game/players/<player_id>/points', methods=['POST'])
+def add_points(player_id):
+    """Credits a verified task: {"points": 15, "name": "..."}"""
+    data = request.json or {}
+    try:
+        points = int(data['points'])
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'error': 'points must be an integer', 'success': False}), 400
+    if not 0 <= points <= MAX_TASK_POINTS:
+        return jsonify({'error': f'points must be between 0 and {MAX_TASK_POINTS}', 'success': False}), 400
+
+    with leaderboard_lock:
+        total = store.add_points(player_id, points, data.get('name'))
+        leaderboard.set(player_id, total)
+        rank = leaderboard.rank(player_id)
+    return jsonify({'player_id': player_id, 'points': total, 'rank': rank,
+                    'players': len(leaderboard), 'success': True})
+
+@app.route('/api/game/players/<player_id>', methods=['GET'])
+def player_standing(player_id):
+    """A player's total, rank and the neighbours around them (?around=5)"""
+    player = store.get(player_id)
+    if player is None:
+        return jsonify({'error': 'Unknown player', 'success': False}), 404
+    k = min(int(request.args.get('around', 5)), 50)
+    with leaderboard_lock:
+        rank = leaderboard.rank(player_id)
+        nearby = leaderboard.around(player_id, k)
+    return jsonify({**player, 'rank': rank, 'players': len(leaderboard),
+                    'nearby': _with_names(nearby), 'success': True})
+
+@app.route('/api/game/leaderboard', methods=['GET'])
+def top_players():
+    """Top-k page of the leaderboard (?limit=10&offset=0)"""
+    limit = min(int(request.args.get('limit', 10)), 100)
+    offset = max(int(request.args.get('offset', 0)), 0)
+    with leaderboard_lock:
+        entries = leaderboard.top(limit, offset)
+    return jsonify({'leaderboard': _with_names(entries), 'players': len(leaderboard), 'success': True})
+
+if __name__ == "__main__":
+    app.run(host="0.0.0.0", port=GAME_PORT)
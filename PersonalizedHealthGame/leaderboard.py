@@ -0,0 +1,166 @@
+import random
+
+MAX_LEVEL = 32
+LEVEL_P = 0.25  # Expected 1.33 forward pointers per node
+
+# === Indexable Skip List ===
+class _Node:
+    __slots__ = ('key', 'next', 'span')
+
+    def __init__(self, key, level):
+        self.key = key
+        self.next = [None] * level
+        self.span = [0] * level  # Positions skipped by next[i], which is what makes rank O(log n)
+
+class SkipList:
+    """
+    Sorted set of unique, comparable keys with O(log n) insert, remove,
+    rank lookup and positional access (the order-statistics skip list used
+    for Redis sorted sets).
+    """
+
+    def __init__(self, seed=None):
+        self.head = _Node(None, MAX_LEVEL)
+        self.level = 1
+        self.size = 0
+        self._random = random.Random(seed)
+
+    def __len__(self):
+        return self.size
+
+    def _random_level(self):
+        level = 1
+        while level < MAX_LEVEL and self._random.random() < LEVEL_P:
+            level += 1
+        return level
+
+    def insert(self, key):
+        update = [self.head] * MAX_LEVEL
+        rank = [0] * MAX_LEVEL
+        node = self.head
+        for i in range(self.level - 1, -1, -1):
+            rank[i] = rank[i + 1] if i < self.level - 1 else 0
+            nxt = node.next[i]
+            while nxt is not None and nxt.key < key:
+                rank[i] += node.span[i]
+                node = nxt
+                nxt = node.next[i]
+            update[i] = node
+
+        level = self._random_level()
+        if level > self.level:
+            for i in range(self.level, level):
+                self.head.span[i] = self.size
+            self.level = level
+
+        new = _Node(key, level)
+        for i in range(level):
+            prev = update[i]
+            new.next[i] = prev.next[i]
+            prev.next[i] = new
+            new.span[i] = prev.span[i] - (rank[0] - rank[i])
+            prev.span[i] = rank[0] - rank[i] + 1
+        for i in range(level, self.level):
+            update[i].span[i] += 1
+        self.size += 1
+
+    def remove(self, key):
+        update = [self.head] * MAX_LEVEL
+        node = self.head
+        for i in range(self.level - 1, -1, -1):
+            nxt = node.next[i]
+            while nxt is not None and nxt.key < key:
+                node = nxt
+                nxt = node.next[i]
+            update[i] = node
+
+        target = node.next[0]
+        if target is None or target.key != key:
+            raise KeyError(key)
+        for i in range(self.level):
+            if update[i].next[i] is target:
+                update[i].span[i] += target.span[i] - 1
+                update[i].next[i] = target.next[i]
+            else:
+                update[i].span[i] -= 1
+        while self.level > 1 and self.head.next[self.level - 1] is None:
+            self.level -= 1
+        self.size -= 1
+
+    def rank(self, key):
+        # 0-based position of `key`
+        position = 0
+        node = self.head
+        for i in range(self.level - 1, -1, -1):
+            nxt = node.next[i]
+            while nxt is not None and nxt.key <= key:
+                position += node.span[i]
+                node = nxt
+                nxt = node.next[i]
+            if node is not self.head and node.key == key:
+                return position - 1
+        raise KeyError(key)
+
+    def _node_at(self, index):
+        traversed = 0
+        node = self.head
+        for i in range(self.level - 1, -1, -1):
+            while node.next[i] is not None and traversed + node.span[i] <= index + 1:
+                traversed += node.span[i]
+                node = node.next[i]
+            if traversed == index + 1:
+                return node
+        raise IndexError(index)
+
+    def slice(self, start, count):
+        # Keys at positions [start, start + count): O(log n + count)
+        if start < 0 or start >= self.size or count <= 0:
+            return []
+        node = self._node_at(start)
+        keys = []
+        while node is not None and len(keys) < count:
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+# === Leaderboard ===
+class Leaderboard:
+    """
+    Player points ranked highest first, ties broken by player id. Updates,
+    rank lookups and top-k pages are all O(log n).
+    """
+
+    def __init__(self, seed=None):
+        self.ranking = SkipList(seed)
+        self.points = {}
+
+    def __len__(self):
+        return len(self.points)
+
+    def set(self, player_id, points):
+        old = self.points.get(player_id)
+        if old == points:
+            return
+        if old is not None:
+            self.ranking.remove((-old, player_id))
+        self.ranking.insert((-points, player_id))
+        self.points[player_id] = points
+
+    def rank(self, player_id):
+        # 1-based rank, or None for unknown players
+        points = self.points.get(player_id)
+        if points is None:
+            return None
+        return self.ranking.rank((-points, player_id)) + 1
+
+    def top(self, k=10, offset=0):
+        return [{'rank': offset + i + 1, 'player_id': player_id, 'points': -neg_points}
+                for i, (neg_points, player_id) in enumerate(self.ranking.slice(offset, k))]
+
+    def around(self, player_id, k=5):
+        # Page of up to 2k+1 entries centred on the player
+        rank = self.rank(player_id)
+        if rank is None:
+            return []
+        start = max(0, rank - 1 - k)
+        return self.top(2 * k + 1, start)
@@ -1,8 +1,7 @@
-import os
 import time
 import random
-import requests
 from dotenv import load_dotenv
+from task_bank import get_task_bank
 
 # Load .env variables
 load_dotenv()
@@ -22,53 +21,11 @@ class PersonalizedHealthGame:
         self.user_data['height'] = float(input("Enter your height (cm): "))
         self.user_data['health_conditions'] = input("Any health conditions? (e.g., asthma, none): ").lower()
         self.user_data['goal'] = input("What is your fitness goal? (e.g., lose weight, gain strength, stay active): ").lower()
-        print("\nGenerating personalized tasks using AI...\n")
-        time.sleep(2)
+        print("\nGenerating personalized tasks...\n")
 
     def fetch_tasks_from_groq(self):
-        GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-        GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
-
-        prompt = f"""
-        You are a professional fitness coach and health expert.
-
-        Based on the following user details, generate 5 safe, personalized fitness tasks that help improve health and fitness.
-
-        Each task should be concise, actionable, and include duration or repetitions.
-
-        User details:
-        - Age: {self.user_data['age']}
-        - Weight: {self.user_data['weight']} kg
-        - Height: {self.user_data['height']} cm
-        - Health Conditions: {self.user_data['health_conditions']}
-        - Fitness Goal: {self.user_data['goal']}
-
-        Provide tasks in numbered list format.
-        """
-
-        headers = {
-            "Authorization": f"Bearer {GROQ_API_KEY}",
-            "Content-Type": "application/json"
-        }
-
-        payload = {
-            "model": "llama3-70b-8192",
-            "messages": [
-                {"role": "system", "content": "You are an expert fitness coach."},
-                {"role": "user", "content": prompt}
-            ],
-            "temperature": 0.7,
-            "max_tokens": 500
-        }
-
-        response = requests.post(GROQ_API_URL, json=payload, headers=headers)
-
-        if response.status_code == 200:
-            tasks_response = response.json()['choices'][0]['message']['content']
-            self.tasks = tasks_response.split('\n')
-        else:
-            print(f"Groq API Error: {response.status_code} - {response.text}")
-            exit()
+        # Precomputed bank first; Groq (written back to the bank) only for unseen profiles
+        self.tasks = get_task_bank().tasks_for(self.user_data)
 
     def start_tasks(self):
         for task in self.tasks:
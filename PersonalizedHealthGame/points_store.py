@@ -0,0 +1,85 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+GAME_DB_PATH = os.getenv("GAME_DB_PATH", os.path.join(os.path.dirname(__file__), "game_points.db"))
+
+# === Persistent Points ===
+class PointsStore:
+    """
+    Player totals in SQLite (WAL mode). Points are added with an upsert, so
+    the database is always the source of truth and the in-memory
+    leaderboard can be rebuilt from it on start-up.
+    """
+
+    def __init__(self, path=GAME_DB_PATH):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS players (
+                    player_id TEXT PRIMARY KEY,
+                    name TEXT,
+                    points INTEGER NOT NULL DEFAULT 0,
+                    tasks_completed INTEGER NOT NULL DEFAULT 0,
+                    updated_at TEXT NOT NULL
+                )
+            """)
+
+    def add_points(self, player_id, points, name=None):
+        """
+        Credits a completed task and returns the player's new total.
+        """
+        now = datetime.utcnow().isoformat()
+        with self._lock, self._conn:
+            self._conn.execute("""
+                INSERT INTO players (player_id, name, points, tasks_completed, updated_at)
+                VALUES (?, ?, ?, 1, ?)
+                ON CONFLICT(player_id) DO UPDATE SET
+                    points = points + excluded.points,
+                    tasks_completed = tasks_completed + 1,
+                    name = COALESCE(excluded.name, name),
+                    updated_at = excluded.updated_at
+            """, (player_id, name, points, now))
+            row = self._conn.execute("SELECT points FROM players WHERE player_id = ?", (player_id,)).fetchone()
+        return row[0]
+
+    def get(self, player_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT player_id, name, points, tasks_completed, updated_at FROM players WHERE player_id = ?",
+                (player_id,)).fetchone()
+        if row is None:
+            return None
+        return dict(zip(('player_id', 'name', 'points', 'tasks_completed', 'updated_at'), row))
+
+    def names(self, player_ids):
+        if not player_ids:
+            return {}
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT player_id, name FROM players WHERE player_id IN ({','.join('?' * len(player_ids))})",
+                list(player_ids)).fetchall()
+        return dict(rows)
+
+    def all_points(self, batch_size=10000):
+        # (player_id, points) for every player, streamed for the leaderboard rebuild
+        last = ""
+        while True:
+            # Keyset pages on the primary key, so the lock is never held across a yield
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT player_id, points FROM players WHERE player_id > ? ORDER BY player_id LIMIT ?",
+                    (last, batch_size)).fetchall()
+            if not rows:
+                return
+            yield from rows
+            last = rows[-1][0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,248 @@
+import os
+import re
+import gzip
+import json
+import argparse
+import threading
+from itertools import product
+from functools import lru_cache
+import requests
+from dotenv import load_dotenv
+
+load_dotenv()
+
+GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
+TASK_BANK_PATH = os.getenv("TASK_BANK_PATH", os.path.join(os.path.dirname(__file__), "task_bank.json.gz"))
+TASK_BANK_VERSION = 1
+
+# === Profile Bands ===
+AGE_BANDS = [(17, "under-18"), (34, "18-34"), (49, "35-49"), (64, "50-64"), (200, "65+")]
+# Asian BMI cut-offs (WHO expert consultation), which fit our Indian users better than 25/30
+BMI_BANDS = [(18.5, "underweight"), (23.0, "normal"), (27.5, "overweight"), (float("inf"), "obese")]
+
+# Most restrictive first: a user with several conditions gets the safest task set
+CONDITIONS = {
+    "heart": ["heart", "cardiac", "angina", "bypass", "stent"],
+    "pregnancy": ["pregnan", "expecting"],
+    "asthma": ["asthma", "copd", "breath", "wheez"],
+    "hypertension": ["hypertension", "blood pressure", "bp"],
+    "diabetes": ["diabet", "sugar"],
+    "joint": ["arthritis", "joint", "knee", "back pain", "spine", "slip disc"],
+    "other": [],
+    "none": [],
+}
+NO_CONDITION = {"", "none", "no", "nil", "nothing", "na", "n/a", "-"}
+GOALS = {
+    "lose weight": ["lose", "loss", "fat", "slim"],
+    "gain strength": ["strength", "strong", "muscle", "gain"],
+    "flexibility": ["flexib", "stretch", "yoga", "mobility"],
+    "stay active": [],
+}
+
+def _band(value, bands):
+    for upper, label in bands:
+        if value <= upper:
+            return label
+    return bands[-1][1]
+
+def _compile(vocabulary):
+    # One prefix-matching alternation per label, checked in priority order
+    return [(label, re.compile(r"\b(?:" + "|".join(map(re.escape, words)) + ")"))
+            for label, words in vocabulary.items() if words]
+
+_CONDITION_PATTERNS = _compile(CONDITIONS)
+_GOAL_PATTERNS = _compile(GOALS)
+
+def _match(text, patterns, default):
+    text = text.lower()
+    for label, pattern in patterns:
+        if pattern.search(text):
+            return label
+    return default
+
+def normalize_condition(text):
+    if (text or "").strip().lower() in NO_CONDITION:
+        return "none"
+    return _match(text, _CONDITION_PATTERNS, "other")
+
+def normalize_goal(text):
+    return _match(text or "", _GOAL_PATTERNS, "stay active")
+
+def profile_key(user_data):
+    """
+    Bank key for a user: (age band, BMI band, normalized condition, goal).
+    """
+    height_m = user_data['height'] / 100
+    bmi = user_data['weight'] / (height_m * height_m) if height_m > 0 else 22.0
+    return "|".join((
+        _band(user_data['age'], AGE_BANDS),
+        _band(bmi, BMI_BANDS),
+        normalize_condition(user_data.get('health_conditions', '')),
+        normalize_goal(user_data.get('goal', '')),
+    ))
+
+def all_profile_keys():
+    # "other" is never banked: its tasks depend on the condition the user actually wrote
+    return ["|".join(parts) for parts in product(
+        [label for _, label in AGE_BANDS], [label for _, label in BMI_BANDS],
+        [condition for condition in CONDITIONS if condition != "other"], GOALS)]
+
+# Offline fallback when the bank misses and Groq is unreachable
+GENERIC_TASKS = {
+    "lose weight": ["Brisk walk for 20 minutes", "10 bodyweight squats, 2 sets", "Climb stairs for 5 minutes",
+                    "30-second plank, 2 times", "Skip sugary drinks today and drink 8 glasses of water"],
+    "gain strength": ["10 wall or knee push-ups, 2 sets", "12 bodyweight squats, 2 sets", "20-second plank, 3 times",
+                      "10 glute bridges, 2 sets", "Walk for 15 minutes"],
+    "flexibility": ["Neck and shoulder rolls for 2 minutes", "Hamstring stretch, 30 seconds each leg",
+                    "Cat-cow stretch, 10 slow repetitions", "Standing side bends, 10 each side",
+                    "5 minutes of deep breathing"],
+    "stay active": ["Walk for 15 minutes", "10 chair sit-to-stands", "Stretch your arms and legs for 5 minutes",
+                    "Take a 2-minute movement break every hour today", "5 minutes of deep breathing"],
+}
+
+# Low-intensity set for anyone with a health condition, whatever their goal
+GENTLE_TASKS = ["Walk at an easy pace for 10 minutes", "5 chair sit-to-stands, resting as needed",
+                "Seated arm and shoulder stretches for 3 minutes", "5 minutes of slow deep breathing",
+                "Check with your doctor before starting any harder exercise"]
+
+def generic_tasks(key):
+    _, _, condition, goal = key.split("|")
+    return list(GENERIC_TASKS[goal] if condition == "none" else GENTLE_TASKS)
+
+# === LLM Generation ===
+def _parse_tasks(text):
+    numbered = [m.group(1).strip() for m in re.finditer(r"^\s*\d+[.)]\s*(.+)$", text, re.MULTILINE)]
+    return numbered or [line.strip() for line in text.splitlines() if line.strip()]
+
+def generate_tasks(key, condition_text=None, timeout=30):
+    """
+    Asks Groq for five tasks for a profile key. Raises on any API failure.
+    The prompt only uses the bands, so the answer is reusable for everyone in
+    them, unless `condition_text` replaces the condition band.
+    """
+    age, bmi, condition, goal = key.split("|")
+    if condition_text:
+        condition = condition_text.strip()[:200]
+    prompt = f"""
+        You are a professional fitness coach and health expert.
+
+        Generate 5 safe fitness tasks for people in this group. Each task should be concise,
+        actionable, and include duration or repetitions.
+
+        - Age group: {age}
+        - BMI category: {bmi}
+        - Health condition: {condition}
+        - Fitness goal: {goal}
+
+        Provide tasks in numbered list format.
+        """
+    response = requests.post(
+        GROQ_API_URL,
+        headers={"Authorization": f"Bearer {os.getenv('GROQ_API_KEY')}", "Content-Type": "application/json"},
+        json={
+            "model": "llama3-70b-8192",
+            "messages": [
+                {"role": "system", "content": "You are an expert fitness coach."},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.7,
+            "max_tokens": 500
+        },
+        timeout=timeout,
+    )
+    response.raise_for_status()
+    tasks = _parse_tasks(response.json()['choices'][0]['message']['content'])
+    if not tasks:
+        raise ValueError(f"Groq returned no tasks for {key}")
+    return tasks
+
+# === Task Bank ===
+class TaskBank:
+    """
+    Profile key -> task list, stored as one gzip-compressed JSON file that is
+    read once. Misses filled from the LLM are written back atomically so the
+    next user with the same profile is served from memory.
+    """
+
+    def __init__(self, path=TASK_BANK_PATH):
+        self.path = path
+        self.tasks = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == TASK_BANK_VERSION:
+                self.tasks = data["tasks"]
+
+    def __len__(self):
+        return len(self.tasks)
+
+    def get(self, key):
+        return self.tasks.get(key)
+
+    def put(self, key, tasks, save=True):
+        with self._lock:
+            self.tasks[key] = tasks
+            if save:
+                self._save()
+
+    def save(self):
+        with self._lock:
+            self._save()
+
+    def _save(self):
+        tmp = f"{self.path}.tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=9) as f:
+            json.dump({"version": TASK_BANK_VERSION, "tasks": self.tasks}, f,
+                      ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, self.path)
+
+    def tasks_for(self, user_data):
+        """
+        Bank hit, else LLM with write-back, else the generic offline set.
+        Unrecognized conditions always go to the LLM with the user's own
+        wording and are not banked.
+        """
+        key = profile_key(user_data)
+        other = key.split("|")[2] == "other"
+        tasks = None if other else self.get(key)
+        if tasks is not None:
+            return list(tasks)
+        try:
+            tasks = generate_tasks(key, user_data.get('health_conditions') if other else None)
+        except Exception as e:
+            print(f"⚠️ Task generation unavailable ({e}), using standard tasks")
+            return generic_tasks(key)
+        if not other:
+            self.put(key, tasks)
+        return list(tasks)
+
+@lru_cache(maxsize=None)
+def get_task_bank(path=TASK_BANK_PATH):
+    return TaskBank(path)
+
+# === Offline Build ===
+def build_bank(path=TASK_BANK_PATH, checkpoint_every=20):
+    """
+    Fills every missing profile key from Groq. Re-running resumes where a
+    previous (interrupted or rate-limited) build stopped.
+    """
+    bank = TaskBank(path)
+    missing = [key for key in all_profile_keys() if bank.get(key) is None]
+    print(f"📦 {len(bank)} profiles banked, {len(missing)} to generate")
+    for i, key in enumerate(missing, 1):
+        try:
+            bank.put(key, generate_tasks(key), save=False)
+        except Exception as e:
+            print(f"⚠️ {key}: {e}")
+        if i % checkpoint_every == 0:
+            bank.save()
+            print(f"   {i}/{len(missing)}")
+    bank.save()
+    print(f"✅ {len(bank)} profiles in {path} ({os.path.getsize(path) / 1024:.1f} KB)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the precomputed personalized task bank")
+    parser.add_argument("--path", default=TASK_BANK_PATH)
+    args = parser.parse_args()
+    build_bank(args.path)
@@ -1,6 +1,8 @@
 // Fitness Game API for personalized task generation and analysis
 import { API_KEYS } from '../config/apiKeys';
 
+const GAME_API_URL = 'http://localhost:5003';
+
 export interface TaskRecommendation {
   id: string;
   title: string;
@@ -588,4 +590,55 @@ Provide insights as a simple list of 5 actionable recommendations that relate to
     'Combine different exercise types to become a well-rounded eco-warrior',
     'Stay hydrated and rest well between missions to maintain your rescue powers'
   ];
-};
\ No newline at end of file
+};
+
+export interface LeaderboardEntry {
+  rank: number;
+  player_id: string;
+  name: string | null;
+  points: number;
+}
+
+export interface PlayerStanding {
+  player_id: string;
+  points: number;
+  rank: number;
+  players: number;
+}
+
+// Credit verified task points on the game server; returns the new total and rank
+export const submitTaskPoints = async (
+  playerId: string,
+  points: number,
+  name?: string
+): Promise<PlayerStanding | null> => {
+  try {
+    const response = await fetch(`${GAME_API_URL}/api/game/players/${encodeURIComponent(playerId)}/points`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ points, name }),
+    });
+    if (!response.ok) {
+      throw new Error(`Game server error: ${response.status}`);
+    }
+    return await response.json();
+  } catch (error) {
+    console.error('Points submission error:', error);
+    return null;
+  }
+};
+
+// Fetch a page of the leaderboard (highest points first)
+export const getLeaderboard = async (limit: number = 10, offset: number = 0): Promise<LeaderboardEntry[]> => {
+  try {
+    const response = await fetch(`${GAME_API_URL}/api/game/leaderboard?limit=${limit}&offset=${offset}`);
+    if (!response.ok) {
+      throw new Error(`Game server error: ${response.status}`);
+    }
+    const data = await response.json();
+    return data.leaderboard || [];
+  } catch (error) {
+    console.error('Leaderboard fetch error:', error);
+    return [];
+  }
+};